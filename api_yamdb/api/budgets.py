@@ -0,0 +1,75 @@
+"""Бюджеты SQL-запросов на действие представления.
+
+Ключ бюджета - `<basename>.<action>` для ViewSet и имя функции для
+представлений `@api_view`. Бюджет не зависит от числа объектов в ответе:
+превышение означает лишний запрос или N+1. Запросы считаются целиком
+на HTTP-запрос, включая аутентификацию и сигналы моделей.
+
+Действие, которое пишет пачками, добавляет к бюджету запросы сверх первой
+пачки через extend_budget(): их число растёт с размером запроса.
+"""
+QUERY_BUDGETS = {
+    'categories.list': 3,
+    'categories.create': 3,
+    'categories.destroy': 6,
+    'genres.list': 3,
+    'genres.create': 3,
+    'genres.destroy': 5,
+    'titles.list': 5,
+    'titles.retrieve': 5,
+    'titles.create': 12,
+    'titles.update': 13,
+    'titles.partial_update': 13,
+    'titles.destroy': 10,
+    'titles.stats': 2,
+    'titles.bulk': 16,
+    'reviews.list': 5,
+    'reviews.retrieve': 3,
+    'reviews.create': 6,
+    'reviews.update': 6,
+    'reviews.partial_update': 6,
+    'reviews.destroy': 7,
+    'comments.list': 4,
+    'comments.retrieve': 2,
+    'comments.create': 4,
+    'comments.update': 3,
+    'comments.partial_update': 3,
+    'comments.destroy': 5,
+    'users.list': 3,
+    'users.retrieve': 2,
+    'users.create': 4,
+    'users.update': 3,
+    'users.partial_update': 3,
+    'users.destroy': 9,
+    'users.change_user_fields': 3,
+    'user_signup': 7,
+    'get_token': 1,
+    'suggest': 3,
+}
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше запросов, чем разрешено бюджетом."""
+
+
+def extend_budget(request, queries):
+    """Ещё queries запросов к бюджету действия для этого запроса."""
+
+    request = getattr(request, '_request', request)
+    request.query_budget_extra = (
+        getattr(request, 'query_budget_extra', 0) + queries
+    )
+
+
+def check_budget(key, queries, extra=0):
+    """Ошибка, если запросов больше бюджета действия key и extra."""
+
+    budget = QUERY_BUDGETS.get(key)
+    if budget is None:
+        return
+    budget += extra
+    if len(queries) > budget:
+        raise QueryBudgetExceeded(
+            f'{key}: {len(queries)} запросов к БД при бюджете {budget}:\n'
+            + '\n'.join(queries)
+        )
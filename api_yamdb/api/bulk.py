@@ -0,0 +1,182 @@
+"""Массовое создание и обновление произведений.
+
+Слаги жанров и категорий всех элементов разрешаются одним запросом на
+модель, произведения и их связи с жанрами записываются пачками в одной
+транзакции. Ошибки возвращаются списком по элементам запроса, как у
+`ListSerializer`, и тогда в БД ничего не записывается.
+
+Число запросов растёт только с числом пачек: пачки сверх первой
+добавляются к бюджету `titles.bulk`, см. api.budgets.
+"""
+import math
+
+from django.db import NotSupportedError, connection, transaction
+from rest_framework import serializers
+
+from reviews import search
+from reviews.models import (Category, Genre, GenreTitle, ScoreDistribution,
+                            Title)
+from reviews.validators import validate_year
+from . import versions
+from .budgets import extend_budget
+
+BULK_MAX_ITEMS = 5000
+BATCH_SIZE = 500
+TITLE_FIELDS = ('name', 'year', 'description', 'category')
+
+
+def batch_count(objs, fields):
+    """Число запросов, которыми bulk_create или bulk_update запишут objs.
+
+    Django делит запись на пачки не больше BATCH_SIZE и не больше, чем
+    позволяет число параметров запроса в БД.
+    """
+
+    if not objs:
+        return 0
+    size = min(
+        BATCH_SIZE, max(connection.ops.bulk_batch_size(fields, objs), 1)
+    )
+    return math.ceil(len(objs) / size)
+
+
+def bulk_create_with_pks(model, objs):
+    """bulk_create, после которого у всех объектов заполнен pk.
+
+    PostgreSQL возвращает id вставленных строк, SQLite в Django 3.2 - нет.
+    В SQLite после первой вставки транзакция держит блокировку записи
+    всей БД, а id с AUTOINCREMENT только растут, поэтому последние
+    len(objs) строк таблицы - это вставленные объекты. Для других БД
+    такой гарантии нет.
+    """
+
+    if not (connection.features.can_return_rows_from_bulk_insert
+            or connection.vendor == 'sqlite'):
+        raise NotSupportedError(
+            f'Массовое создание не поддерживается для {connection.vendor}.'
+        )
+    assert connection.in_atomic_block, 'Нужна транзакция.'
+    objs = model.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+    if objs and objs[0].pk is None:
+        pks = model.objects.order_by('-pk').values_list('pk', flat=True)
+        for obj, pk in zip(objs, reversed(list(pks[:len(objs)]))):
+            obj.pk = pk
+    return objs
+
+
+class BulkTitleListSerializer(serializers.ListSerializer):
+    """Список произведений для создания (без `id`) и замены (с `id`)."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, list) and len(data) > BULK_MAX_ITEMS:
+            raise serializers.ValidationError({
+                'non_field_errors': [
+                    f'Не больше {BULK_MAX_ITEMS} произведений за запрос.'
+                ]
+            })
+        return self.resolve(super().to_internal_value(data))
+
+    def resolve(self, attrs):
+        """Замена слагов объектами; ошибки - списком по элементам."""
+        genres = Genre.objects.in_bulk(
+            {slug for item in attrs for slug in item['genre']},
+            field_name='slug'
+        )
+        categories = Category.objects.in_bulk(
+            {item['category'] for item in attrs}, field_name='slug'
+        )
+        ids = [item['id'] for item in attrs if 'id' in item]
+        existing = set(
+            Title.objects.filter(pk__in=ids).values_list('pk', flat=True)
+        )
+        errors = []
+        seen = set()
+        for item in attrs:
+            item_errors = {}
+            unknown = [slug for slug in item['genre'] if slug not in genres]
+            if unknown:
+                item_errors['genre'] = [
+                    f'Жанр со слагом {slug} не найден.' for slug in unknown
+                ]
+            if item['category'] not in categories:
+                item_errors['category'] = [
+                    f'Категория со слагом {item["category"]} не найдена.'
+                ]
+            if 'id' in item:
+                if item['id'] not in existing:
+                    item_errors['id'] = ['Произведение не найдено.']
+                elif item['id'] in seen:
+                    item_errors['id'] = ['Произведение указано дважды.']
+                seen.add(item['id'])
+            errors.append(item_errors)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        for item in attrs:
+            item['category'] = categories[item['category']]
+            item['genre'] = [
+                genres[slug] for slug in dict.fromkeys(item['genre'])
+            ]
+        return attrs
+
+    def extend_budget(self, writes):
+        """Пачки сверх первой у каждой записи (objs, поля) - к бюджету."""
+
+        request = self.context.get('request')
+        if request is not None:
+            extend_budget(request, sum(
+                max(batch_count(objs, fields) - 1, 0)
+                for objs, fields in writes
+            ))
+
+    def create(self, validated_data):
+        titles = [
+            Title(pk=item.get('id'), **{
+                field: item.get(field, '') for field in TITLE_FIELDS
+            })
+            for item in validated_data
+        ]
+        new = [title for title in titles if title.pk is None]
+        updated = [title for title in titles if title.pk is not None]
+        links = [
+            GenreTitle(title=title, genre=genre)
+            for title, item in zip(titles, validated_data)
+            for genre in item['genre']
+        ]
+        distributions = [ScoreDistribution(title=title) for title in new]
+        self.extend_budget((
+            (new, [field for field in Title._meta.concrete_fields
+                   if not field.primary_key]),
+            (updated, ('pk', 'pk') + TITLE_FIELDS),
+            (links, [field for field in GenreTitle._meta.concrete_fields
+                     if not field.primary_key]),
+            (distributions, ScoreDistribution._meta.concrete_fields),
+        ))
+        with transaction.atomic():
+            bulk_create_with_pks(Title, new)
+            Title.objects.bulk_update(
+                updated, TITLE_FIELDS, batch_size=BATCH_SIZE
+            )
+            GenreTitle.objects.filter(
+                title__in=[title.pk for title in updated]
+            ).delete()
+            GenreTitle.objects.bulk_create(links, batch_size=BATCH_SIZE)
+            ScoreDistribution.objects.bulk_create(
+                distributions, batch_size=BATCH_SIZE
+            )
+            search.index_titles(titles)
+            versions.bump('titles')
+        return titles
+
+
+class BulkTitleSerializer(serializers.ModelSerializer):
+    """Элемент массовой загрузки произведений."""
+
+    id = serializers.IntegerField(required=False)
+    genre = serializers.ListField(child=serializers.SlugField())
+    category = serializers.SlugField()
+    year = serializers.IntegerField(validators=[validate_year])
+
+    class Meta:
+        model = Title
+        fields = ('id', 'name', 'year', 'description', 'genre', 'category')
+        list_serializer_class = BulkTitleListSerializer
@@ -0,0 +1,130 @@
+"""Встраивание связанных объектов в ответ по параметру `?expand=`.
+
+Каждый уровень вложенности загружается одним запросом `Prefetch` для
+всех родительских объектов сразу. Число объектов на каждого родителя
+ограничивается параметром `?<уровень>_limit=` внутри того же запроса.
+"""
+from django.db.models import OuterRef, Prefetch, Subquery
+from rest_framework.exceptions import ValidationError
+
+EXPAND_PARAM = 'expand'
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+
+
+def expanded_attr(name):
+    return f'expanded_{name}'
+
+
+def parse_expand(value, available):
+    """Пути `?expand=` из числа `available` вместе с их родителями."""
+
+    expand = set()
+    for path in value.split(','):
+        path = path.strip()
+        if path not in available:
+            continue
+        parts = path.split('.')
+        expand.update(
+            '.'.join(parts[:depth]) for depth in range(1, len(parts) + 1)
+        )
+    return frozenset(expand)
+
+
+def nested_expand(expand, name):
+    prefix = f'{name}.'
+    return frozenset(
+        path[len(prefix):] for path in expand if path.startswith(prefix)
+    )
+
+
+def limited_prefetch(lookup, queryset, parent_field, limit, ordering,
+                     through=None):
+    """Prefetch первых `limit` объектов каждого родителя одним запросом.
+
+    Результат попадает в атрибут `expanded_<lookup>` родителя. `through`
+    - путь до родителей, уже загруженных предыдущим уровнем.
+    """
+
+    first = queryset.model.objects.filter(
+        **{parent_field: OuterRef(parent_field)}
+    ).order_by(*ordering).values('pk')[:limit]
+    if through is not None:
+        lookup = f'{through}__{lookup}'
+    return Prefetch(
+        lookup,
+        queryset=queryset.filter(pk__in=Subquery(first)).order_by(*ordering),
+        to_attr=expanded_attr(lookup.split('__')[-1])
+    )
+
+
+class ExpandSerializerMixin:
+    """Добавляет в ответ встроенные списки, запрошенные в `?expand=`.
+
+    Пути берутся из `context['expand']`, объекты - из атрибутов
+    `expanded_<имя>`, заполненных `limited_prefetch`.
+    """
+
+    def get_expand_serializers(self):
+        return {}
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        expand = self.context.get('expand', ())
+        for name, serializer_class in self.get_expand_serializers().items():
+            if name not in expand:
+                continue
+            data[name] = serializer_class(
+                getattr(instance, expanded_attr(name)),
+                many=True,
+                context={'expand': nested_expand(expand, name)}
+            ).data
+        return data
+
+
+class ExpandViewMixin:
+    """Разбор `?expand=` и подгрузка встраиваемых объектов.
+
+    `expand_collections` сопоставляет допустимому пути коллекцию, от
+    которой зависит встроенный список, `expand_actions` - действия,
+    поддерживающие встраивание.
+    """
+
+    expand_actions = ()
+    expand_collections = {}
+
+    def get_expand(self):
+        if self.action not in self.expand_actions:
+            return frozenset()
+        return parse_expand(
+            self.request.query_params.get(EXPAND_PARAM, ''),
+            self.expand_collections
+        )
+
+    def get_expand_limit(self, name):
+        param = f'{name}_limit'
+        try:
+            limit = int(self.request.query_params.get(param, DEFAULT_LIMIT))
+        except ValueError:
+            raise ValidationError({param: 'Ожидается целое число.'})
+        return max(1, min(limit, MAX_LIMIT))
+
+    def get_expand_prefetches(self, expand):
+        return []
+
+    def get_conditional_collections(self):
+        collections = super().get_conditional_collections()
+        return tuple(dict.fromkeys(collections + tuple(
+            self.expand_collections[path] for path in sorted(self.get_expand())
+        )))
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['expand'] = self.get_expand()
+        return context
+
+    def expand_queryset(self, queryset):
+        expand = self.get_expand()
+        if not expand:
+            return queryset
+        return queryset.prefetch_related(*self.get_expand_prefetches(expand))
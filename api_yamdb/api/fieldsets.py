@@ -0,0 +1,90 @@
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+
+
+def parse_names(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def get_field_names(request, available):
+    """Поля ответа по параметрам `?fields=` и `?omit=`.
+
+    Возвращает None, если набор полей не сужается. Неизвестные имена
+    полей игнорируются.
+    """
+
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    fields = parse_names(request.query_params.get(FIELDS_PARAM, ''))
+    omit = parse_names(request.query_params.get(OMIT_PARAM, ''))
+    if not fields and not omit:
+        return None
+    names = set(available)
+    if fields:
+        names &= fields
+    return names - omit
+
+
+def get_ordering_fields(request, queryset, view):
+    """Поля модели, по которым сортируется ответ.
+
+    Их значения нужны курсорной пагинации. Сортировка берётся, как в
+    CursorPagination: из первого фильтра с get_ordering(), иначе из
+    `ordering` представления.
+    """
+
+    for backend in getattr(view, 'filter_backends', ()):
+        if hasattr(backend, 'get_ordering'):
+            ordering = backend().get_ordering(request, queryset, view)
+            break
+    else:
+        ordering = getattr(view, 'ordering', None)
+    if isinstance(ordering, str):
+        ordering = (ordering,)
+    return [field.lstrip('-') for field in ordering or ()]
+
+
+class SparseFieldsSerializerMixin:
+    """Отбрасывает поля сериализатора, не запрошенные клиентом."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sparse = False
+        names = get_field_names(self.context.get('request'), self.fields)
+        if names is None:
+            return
+        self.sparse = True
+        for name in set(self.fields) - names:
+            self.fields.pop(name)
+
+
+class SparseFieldsViewMixin:
+    """Загружает из БД только столбцы запрошенных полей.
+
+    `sparse_fields` сопоставляет полю сериализатора поля модели для
+    `only()`, `sparse_select_related` - связи, которые нужны полю.
+    Связи остальных полей из `select_related` исключаются.
+    """
+
+    sparse_fields = {}
+    sparse_select_related = {}
+
+    def get_sparse_fields(self):
+        return get_field_names(self.request, self.sparse_fields)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        names = self.get_sparse_fields()
+        if names is None:
+            return queryset
+        only = [queryset.model._meta.pk.name]
+        only.extend(get_ordering_fields(self.request, queryset, self))
+        related = []
+        for name in names:
+            only.extend(self.sparse_fields[name])
+            if name in self.sparse_select_related:
+                related.append(self.sparse_select_related[name])
+        return queryset.select_related(None).select_related(*related)\
+            .only(*only)
@@ -0,0 +1,22 @@
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from reviews import search
+
+
+class FullTextSearchFilter(filters.BaseFilterBackend):
+    """Полнотекстовый поиск произведений по параметру `?q=`.
+
+    Без явного `?ordering=` результаты сортируются по релевантности.
+    """
+
+    search_param = 'q'
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        queryset = search.search_titles(queryset, text)
+        if api_settings.ORDERING_PARAM in request.query_params:
+            return queryset
+        return queryset.order_by('search_rank', 'pk')
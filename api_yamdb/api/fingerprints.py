@@ -0,0 +1,136 @@
+"""Отпечатки SQL-запросов: поиск N+1 и медленных запросов.
+
+Отпечаток - текст запроса без значений: литералы и параметры заменены
+на `?`, списки `IN (...)` и пачки строк INSERT свёрнуты. Один отпечаток,
+повторённый в ответе `SQL_REPEAT_THRESHOLD` раз и больше, - признак
+N+1, запросы дольше `SQL_SLOW_MS` пишутся в лог со стеком вызова.
+Статистика по представлениям и отпечаткам копится в файлах процессов
+рядом с метриками, см. api.metrics, и выводится командой sqlreport.
+"""
+import logging
+import random
+import re
+import time
+import traceback
+
+from django.conf import settings
+from django.db import connection
+
+from .metrics import get_store
+from .routes import get_route_name
+
+logger = logging.getLogger('api.sql')
+STORE_PREFIX = 'sql'
+FIELDS = ('calls', 'seconds', 'requests', 'repeated')
+STACK_LIMIT = 10
+
+NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'"s\d+_x\d+"'), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\s+'), ' '),
+    (re.compile(r'IN \((?:\?, )*\?\)'), 'IN (...)'),
+    (re.compile(r'(\((?:\?, )*\?\))(?:, \((?:\?, )*\?\))+'), r'\1, ...'),
+    (re.compile(r'(?: UNION ALL SELECT (?:\?, )*\?)+'),
+     ' UNION ALL SELECT ...'),
+)
+
+
+def fingerprint(sql):
+    for pattern, replacement in NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def project_stack():
+    """Кадры стека из кода проекта, последние STACK_LIMIT."""
+
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and frame.filename != __file__
+    ]
+    return ''.join(traceback.format_list(frames[-STACK_LIMIT:]))
+
+
+class SqlRecorder:
+    """Обёртка connection.execute_wrapper: отпечатки и медленные запросы."""
+
+    def __init__(self, slow_seconds):
+        self.slow_seconds = slow_seconds
+        self.statements = {}
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            stats = self.statements.setdefault(fingerprint(sql), [0, 0.0])
+            stats[0] += 1
+            stats[1] += duration
+            if duration >= self.slow_seconds:
+                self.slow.append((sql, duration, project_stack()))
+
+
+def store_key(field, view, statement):
+    return '\t'.join((field, view, statement))
+
+
+def parse_key(key):
+    return key.split('\t', 2)
+
+
+def is_enabled():
+    if getattr(settings, 'SQL_FINGERPRINTS', False):
+        return True
+    sample_rate = getattr(settings, 'SQL_FINGERPRINTS_SAMPLE_RATE', 0)
+    return bool(sample_rate) and random.random() < sample_rate
+
+
+class SqlFingerprintMiddleware:
+    """Отпечатки SQL-запросов ответа, см. модуль.
+
+    Включается `SQL_FINGERPRINTS = True` для всех запросов или долей
+    `SQL_FINGERPRINTS_SAMPLE_RATE` для выборки в продакшене.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not is_enabled():
+            return self.get_response(request)
+        recorder = SqlRecorder(
+            getattr(settings, 'SQL_SLOW_MS', 100) / 1000
+        )
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        self.report(request, recorder)
+        return response
+
+    def report(self, request, recorder):
+        view = get_route_name(request) or request.path
+        threshold = getattr(settings, 'SQL_REPEAT_THRESHOLD', 3)
+        store = get_store(STORE_PREFIX)
+        for statement, (count, seconds) in recorder.statements.items():
+            repeated = count >= threshold
+            if repeated:
+                logger.warning(
+                    'Повторный запрос в %s: %d раз(а) %s',
+                    view, count, statement
+                )
+            if store is not None:
+                for field, value in zip(
+                    FIELDS, (count, seconds, 1, repeated)
+                ):
+                    if value:
+                        store.inc(store_key(field, view, statement), value)
+        for sql, duration, stack in recorder.slow:
+            logger.warning(
+                'Медленный запрос в %s: %.1f мс\n%s\n%s',
+                view, duration * 1000, sql, stack
+            )
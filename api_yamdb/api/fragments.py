@@ -0,0 +1,46 @@
+"""Кэш сериализованных произведений.
+
+Ключ фрагмента состоит из id произведения и штампа - версий коллекций,
+от которых зависит его представление: произведений (с их жанрами),
+отзывов (рейтинг), жанров и категорий. Штамп собирается из версий,
+прочитанных представлением до запросов к БД (см. ConditionalGetMixin),
+поэтому фрагмент, построенный по данным до записи, ложится под ключ,
+который после смены версий уже не читается, и отдельный сброс не нужен.
+"""
+from django.core.cache import cache
+
+from .metrics import cache_lookup
+
+FRAGMENT_TIMEOUT = 60 * 60 * 24
+STAMP_COLLECTIONS = ('titles', 'reviews', 'genres', 'categories')
+
+
+def get_stamp(versions):
+    """Штамп из версий {коллекция: версия} или None, если каких-то нет."""
+
+    if not set(STAMP_COLLECTIONS) <= versions.keys():
+        return None
+    return '.'.join(str(versions[name]) for name in STAMP_COLLECTIONS)
+
+
+def fragment_key(title_id, stamp):
+    return f'title-fragment:{title_id}:{stamp}'
+
+
+def get_fragments(title_ids, stamp):
+    keys = {fragment_key(title_id, stamp): title_id for title_id in title_ids}
+    fragments = {
+        keys[key]: value for key, value in cache.get_many(keys).items()
+    }
+    cache_lookup('fragments', len(fragments), len(keys) - len(fragments))
+    return fragments
+
+
+def set_fragments(fragments, stamp):
+    cache.set_many(
+        {
+            fragment_key(title_id, stamp): value
+            for title_id, value in fragments.items()
+        },
+        FRAGMENT_TIMEOUT
+    )
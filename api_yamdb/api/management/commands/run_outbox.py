@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api.outbox import process_batch
+
+
+class Command(BaseCommand):
+    help = 'отправка писем из очереди в БД, см. api/outbox.py'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=getattr(settings, 'OUTBOX_BATCH_SIZE', 100),
+            help='Писем в пачке, отправляемой через одно соединение.'
+        )
+        parser.add_argument(
+            '--interval', type=float,
+            default=getattr(settings, 'OUTBOX_POLL_INTERVAL', 5),
+            help='Пауза в секундах, когда готовых писем нет.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Отправить готовые письма и выйти.'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        while True:
+            # Как после запроса: не держать соединение с БД сверх
+            # CONN_MAX_AGE и не работать с разорванным.
+            close_old_connections()
+            sent, failed = process_batch(batch_size)
+            if sent or failed:
+                self.stdout.write(
+                    f'Отправлено писем: {sent}, с ошибкой: {failed}'
+                )
+            if sent + failed < batch_size:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
@@ -0,0 +1,80 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.fingerprints import STORE_PREFIX, parse_key
+from api.metrics import collect, store_files
+
+ORDERS = {
+    'time': lambda stats: stats['seconds'],
+    'calls': lambda stats: stats['calls'],
+    'repeated': lambda stats: (stats['repeated'], stats['calls']),
+}
+
+
+def get_report(directory):
+    """Статистика по парам (представление, отпечаток) всех процессов."""
+
+    report = {}
+    for key, value in collect(directory, STORE_PREFIX).items():
+        field, view, statement = parse_key(key)
+        stats = report.setdefault((view, statement), {
+            'calls': 0, 'seconds': 0.0, 'requests': 0, 'repeated': 0,
+        })
+        stats[field] += value
+    return report
+
+
+class Command(BaseCommand):
+    help = 'самые тяжёлые SQL-запросы по отпечаткам, см. api/fingerprints.py'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument(
+            '--order', choices=ORDERS, default='time',
+            help='time - суммарное время, calls - число вызовов, '
+                 'repeated - число ответов с повтором запроса (N+1).'
+        )
+        parser.add_argument(
+            '--view', help='Только представление, например reviews.list.'
+        )
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Удалить накопленную статистику.'
+        )
+
+    def handle(self, *args, **options):
+        directory = settings.METRICS_DIR
+        if options['reset']:
+            for path in store_files(directory, STORE_PREFIX):
+                os.remove(path)
+            self.stdout.write(self.style.SUCCESS('Статистика удалена'))
+            return
+        report = get_report(directory)
+        if options['view']:
+            report = {
+                key: stats for key, stats in report.items()
+                if key[0] == options['view']
+            }
+        if not report:
+            self.stdout.write(
+                'Нет данных: включите SQL_FINGERPRINTS и задайте METRICS_DIR.'
+            )
+            return
+        rows = sorted(
+            report.items(), key=lambda item: ORDERS[options['order']](item[1]),
+            reverse=True
+        )[:options['limit']]
+        self.stdout.write(
+            f'{"вызовов":>9} {"всего, мс":>11} {"среднее, мс":>12} '
+            f'{"ответов":>8} {"N+1":>6}  представление'
+        )
+        for (view, statement), stats in rows:
+            calls = int(stats['calls'])
+            total = stats['seconds'] * 1000
+            self.stdout.write(
+                f'{calls:>9} {total:>11.2f} {total / max(calls, 1):>12.3f} '
+                f'{int(stats["requests"]):>8} {int(stats["repeated"]):>6}  '
+                f'{view}\n    {statement}'
+            )
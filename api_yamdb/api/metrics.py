@@ -0,0 +1,291 @@
+"""Метрики приложения в текстовом формате Prometheus.
+
+Каждый процесс пишет свои значения в отдельный файл папки
+`METRICS_DIR` через mmap: обновление - это запись числа в память под
+локом своего процесса, без блокировок между процессами. `/metrics`
+читает файлы всех процессов и суммирует значения. Файлы остаются после
+остановки процесса, чтобы счётчики не убывали, поэтому папку нужно
+очищать при перезапуске сервиса. `/metrics` отвечает только адресам и
+сетям из `METRICS_ALLOWED_IPS`.
+"""
+import ipaddress
+import mmap
+import os
+import struct
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from .routes import get_route
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_BUCKETS = (1, 2, 3, 5, 8, 13, 20, 50, 100)
+FAMILIES = {
+    'yamdb_http_requests_total': (
+        'counter', 'Число ответов по маршруту, действию и статусу.'
+    ),
+    'yamdb_http_request_duration_seconds': (
+        'histogram', 'Время ответа по маршруту и действию.'
+    ),
+    'yamdb_db_queries_per_request': (
+        'histogram', 'Число SQL-запросов на один ответ.'
+    ),
+    'yamdb_cache_requests_total': (
+        'counter', 'Обращения к кэшу: result="hit" или "miss".'
+    ),
+}
+HEADER = struct.Struct('q')
+KEY_LENGTH = struct.Struct('i')
+VALUE = struct.Struct('d')
+
+
+def entry_sizes(key):
+    """Длина заголовка записи с ключом и полная длина записи.
+
+    Значение выравнивается по 8 байт, чтобы запись double была атомарной.
+    """
+
+    head = KEY_LENGTH.size + len(key)
+    head += -head % 8
+    return head, head + VALUE.size
+
+
+def read_entries(data, used):
+    position = HEADER.size
+    while position < used:
+        (length,) = KEY_LENGTH.unpack_from(data, position)
+        start = position + KEY_LENGTH.size
+        key = bytes(data[start:start + length]).decode()
+        head, size = entry_sizes(key.encode())
+        (value,) = VALUE.unpack_from(data, position + head)
+        yield key, value, position + head
+        position += size
+
+
+class MmapStore:
+    """Значения float по строковым ключам в файле одного процесса.
+
+    Формат файла: 8 байт - занятая длина, затем записи из длины ключа,
+    ключа и значения double.
+    """
+
+    INITIAL_SIZE = 64 * 1024
+
+    def __init__(self, path):
+        self.lock = threading.Lock()
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT)
+        self.capacity = os.fstat(self.fd).st_size
+        if self.capacity == 0:
+            self.capacity = self.INITIAL_SIZE
+            os.ftruncate(self.fd, self.capacity)
+        self.map = mmap.mmap(self.fd, self.capacity)
+        self.used = HEADER.unpack_from(self.map, 0)[0] or HEADER.size
+        self.positions = {
+            key: position
+            for key, _, position in read_entries(self.map, self.used)
+        }
+
+    def inc(self, key, amount=1.0):
+        with self.lock:
+            position = self.positions.get(key)
+            if position is None:
+                position = self.append(key)
+            (value,) = VALUE.unpack_from(self.map, position)
+            VALUE.pack_into(self.map, position, value + amount)
+
+    def append(self, key):
+        encoded = key.encode()
+        head, size = entry_sizes(encoded)
+        while self.used + size > self.capacity:
+            self.grow()
+        KEY_LENGTH.pack_into(self.map, self.used, len(encoded))
+        start = self.used + KEY_LENGTH.size
+        self.map[start:start + len(encoded)] = encoded
+        position = self.used + head
+        VALUE.pack_into(self.map, position, 0.0)
+        self.used += size
+        # Длина обновляется последней: читатели видят только целые записи.
+        HEADER.pack_into(self.map, 0, self.used)
+        self.positions[key] = position
+        return position
+
+    def grow(self):
+        self.map.close()
+        self.capacity *= 2
+        os.ftruncate(self.fd, self.capacity)
+        self.map = mmap.mmap(self.fd, self.capacity)
+
+
+_stores = {}
+
+
+def get_store(prefix='metrics'):
+    """Файл prefix текущего процесса или None, если метрики выключены.
+
+    После fork у процесса новый pid и, соответственно, новый файл.
+    """
+
+    directory = getattr(settings, 'METRICS_DIR', None)
+    if not directory:
+        return None
+    path = os.path.join(directory, f'{prefix}_{os.getpid()}.db')
+    if prefix not in _stores or _stores[prefix][0] != path:
+        os.makedirs(directory, exist_ok=True)
+        _stores[prefix] = (path, MmapStore(path))
+    return _stores[prefix][1]
+
+
+def store_files(directory, prefix='metrics'):
+    if not directory or not os.path.isdir(directory):
+        return []
+    return [
+        os.path.join(directory, file_name)
+        for file_name in sorted(os.listdir(directory))
+        if file_name.startswith(f'{prefix}_') and file_name.endswith('.db')
+    ]
+
+
+def escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"')\
+        .replace('\n', r'\n')
+
+
+def sample(name, labels):
+    if not labels:
+        return name
+    pairs = ','.join(
+        f'{label}="{escape(value)}"' for label, value in labels.items()
+    )
+    return f'{name}{{{pairs}}}'
+
+
+def inc(name, labels, amount=1.0):
+    store = get_store()
+    if store is not None:
+        store.inc(sample(name, labels), amount)
+
+
+def observe(name, labels, value, buckets):
+    """Наблюдение гистограммы: накопительные бакеты, сумма и число."""
+
+    store = get_store()
+    if store is None:
+        return
+    for bound in buckets:
+        if value <= bound:
+            store.inc(sample(f'{name}_bucket', {**labels, 'le': bound}))
+    store.inc(sample(f'{name}_bucket', {**labels, 'le': '+Inf'}))
+    store.inc(sample(f'{name}_sum', labels), value)
+    store.inc(sample(f'{name}_count', labels))
+
+
+def cache_lookup(cache_name, hits, misses):
+    """Попадания и промахи кэша cache_name."""
+
+    if hits:
+        inc('yamdb_cache_requests_total', {
+            'cache': cache_name, 'result': 'hit'
+        }, hits)
+    if misses:
+        inc('yamdb_cache_requests_total', {
+            'cache': cache_name, 'result': 'miss'
+        }, misses)
+
+
+def collect(directory, prefix='metrics'):
+    """Сумма значений по всем файлам процессов."""
+
+    totals = {}
+    for path in store_files(directory, prefix):
+        with open(path, 'rb') as file:
+            data = file.read()
+        if len(data) < HEADER.size:
+            continue
+        used = min(HEADER.unpack_from(data, 0)[0], len(data))
+        for key, value, _ in read_entries(data, used):
+            totals[key] = totals.get(key, 0.0) + value
+    return totals
+
+
+def family(key):
+    name = key.split('{', 1)[0]
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and name[:-len(suffix)] in FAMILIES:
+            return name[:-len(suffix)]
+    return name
+
+
+def format_value(value):
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def is_allowed(address):
+    """Доступен ли `/metrics` клиенту с адресом address."""
+
+    try:
+        address = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in getattr(settings, 'METRICS_ALLOWED_IPS', ())
+    )
+
+
+def render(directory):
+    samples = {}
+    for key, value in collect(directory).items():
+        samples.setdefault(family(key), []).append((key, value))
+    lines = []
+    for name, (kind, help_text) in FAMILIES.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for key, value in samples.get(name, ()):
+            lines.append(f'{key} {format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def get_route_labels(request):
+    route, action = get_route(request)
+    if route is None:
+        match = getattr(request, 'resolver_match', None)
+        route = match.view_name if match is not None else 'unmatched'
+    return {'route': route, 'action': action or ''}
+
+
+class MetricsMiddleware:
+    """Число ответов, время ответа и число SQL-запросов по маршрутам."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if get_store() is None:
+            return self.get_response(request)
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(count):
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+        labels = get_route_labels(request)
+        inc('yamdb_http_requests_total', {
+            **labels,
+            'method': request.method,
+            'status': response.status_code,
+        })
+        observe('yamdb_http_request_duration_seconds', labels, duration,
+                LATENCY_BUCKETS)
+        observe('yamdb_db_queries_per_request', labels, queries,
+                QUERY_BUCKETS)
+        return response
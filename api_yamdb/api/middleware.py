@@ -0,0 +1,85 @@
+import json
+import logging
+import random
+
+from django.conf import settings
+from django.db import connection
+
+from .budgets import check_budget
+from .routes import get_route_name
+from .timing import ServerTiming
+
+logger = logging.getLogger('api.timing')
+
+
+class QueryBudgetMiddleware:
+    """Проверка бюджета SQL-запросов действия, см. api.budgets.
+
+    Работает при `ENFORCE_QUERY_BUDGETS = True`: превышение бюджета
+    вызывает QueryBudgetExceeded со списком выполненных запросов.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'ENFORCE_QUERY_BUDGETS', False):
+            return self.get_response(request)
+        queries = []
+
+        def record(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(record):
+            response = self.get_response(request)
+        check_budget(
+            get_route_name(request), queries,
+            getattr(request, 'query_budget_extra', 0)
+        )
+        return response
+
+
+class ServerTimingMiddleware:
+    """Заголовок Server-Timing с разбивкой времени ответа, см. api.timing.
+
+    Включается `SERVER_TIMING = True`. Доля запросов
+    `SERVER_TIMING_LOG_SAMPLE_RATE` дополнительно пишется в лог
+    `api.timing` одной строкой JSON.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'SERVER_TIMING', False):
+            return self.get_response(request)
+        timing = ServerTiming()
+        request.server_timing = timing
+        with connection.execute_wrapper(timing):
+            response = self.get_response(request)
+            timing.stop('render')
+        timing.finish()
+        response['Server-Timing'] = timing.header()
+        sample_rate = getattr(settings, 'SERVER_TIMING_LOG_SAMPLE_RATE', 0)
+        if sample_rate and random.random() < sample_rate:
+            self.log(request, response, timing)
+        return response
+
+    def process_template_response(self, request, response):
+        # Ответ DRF рендерится сразу после этого вызова.
+        timing = getattr(request, 'server_timing', None)
+        if timing is not None:
+            timing.start('render')
+        return response
+
+    def log(self, request, response, timing):
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'action': get_route_name(request),
+            'status': response.status_code,
+            'queries': timing.queries,
+            **{f'{name}_ms': duration
+               for name, duration in timing.milliseconds().items()},
+        }, ensure_ascii=False))
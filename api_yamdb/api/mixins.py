@@ -0,0 +1,212 @@
+import hashlib
+import math
+
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from .fieldsets import get_ordering_fields
+from .metrics import cache_lookup
+from .versions import get_versions_with
+
+
+class ConditionalGetMixin:
+    """Ответ 304 на условный GET без запроса к БД и сериализации.
+
+    Валидаторы строятся из версий коллекций `conditional_collections`,
+    от которых зависит ответ, пути запроса и формата ответа. Ключи
+    `get_cache_keys()` читаются тем же обращением к кэшу, что и версии;
+    версии и найденные значения сохраняются в `collection_versions` и
+    `cached_values`.
+    """
+
+    conditional_collections = ()
+
+    def get_conditional_collections(self):
+        return tuple(self.conditional_collections)
+
+    def get_cache_keys(self, request):
+        return ()
+
+    def get_validators(self, request):
+        versions, modified, self.cached_values = get_versions_with(
+            self.get_conditional_collections(), self.get_cache_keys(request)
+        )
+        self.collection_versions = versions
+        key = '|'.join((
+            request.get_full_path(),
+            request.accepted_media_type or '',
+            ','.join(map(str, versions)),
+        ))
+        etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+        last_modified = math.ceil(modified) if modified is not None else None
+        return etag, last_modified
+
+    def conditional_get(self, request, handler, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            return response
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_get(request, super().list, *args, **kwargs)
+
+
+class ConditionalRetrieveMixin(ConditionalGetMixin):
+    """То же для списка и для отдельного объекта."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_get(
+            request, super().retrieve, *args, **kwargs
+        )
+
+
+class CachedListMixin(ConditionalGetMixin):
+    """Кэш ответов списка по версиям коллекций `conditional_collections`.
+
+    Каждый вариант списка (поиск, limit, offset) хранится под своим
+    ключом вместе с версиями, при которых он построен, и читается тем же
+    обращением к кэшу, что и версии для ETag. Версии меняются после
+    фиксации записи в коллекцию, поэтому отдельный сброс не нужен, а
+    ответ, построенный по данным до записи, не совпадёт с новыми версиями.
+    """
+
+    list_cache_timeout = 60 * 60
+
+    def get_list_cache_key(self, request):
+        entry = '|'.join((
+            request.scheme,
+            request.get_host(),
+            '&'.join(sorted(
+                f'{key}={value}'
+                for key, values in request.query_params.lists()
+                for value in values
+            )),
+        ))
+        digest = hashlib.md5(entry.encode()).hexdigest()
+        return f'list:{self.basename}:{digest}'
+
+    def get_cache_keys(self, request):
+        keys = super().get_cache_keys(request)
+        if self.action == 'list':
+            keys = (*keys, self.get_list_cache_key(request))
+        return keys
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_get(
+            request, self.cached_list, *args, **kwargs
+        )
+
+    def cached_list(self, request, *args, **kwargs):
+        key = self.get_list_cache_key(request)
+        versions = self.collection_versions
+        cached = self.cached_values.get(key)
+        if cached is not None and cached[0] == versions:
+            cache_lookup('lists', 1, 0)
+            return Response(cached[1])
+        cache_lookup('lists', 0, 1)
+        # Список базовых классов в обход ConditionalGetMixin.list:
+        # валидаторы уже проверены.
+        response = super(ConditionalGetMixin, self).list(
+            request, *args, **kwargs
+        )
+        if response.status_code == 200:
+            cache.set(key, (versions, response.data), self.list_cache_timeout)
+        return response
+
+
+class FastListMixin:
+    """Список через сериализатор на строках values(), если он задан.
+
+    Сериализатор выбирается атрибутом `fast_list_serializer_class`
+    представления и должен отдавать тот же JSON, что и обычный.
+    """
+
+    fast_list_serializer_class = None
+
+    def use_fast_list(self, request):
+        return self.fast_list_serializer_class is not None
+
+    def get_fast_list_serializer(self):
+        return self.fast_list_serializer_class()
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_list(request):
+            return super().list(request, *args, **kwargs)
+        serializer = self.get_fast_list_serializer()
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = serializer.get_queryset(
+            queryset,
+            ordering=get_ordering_fields(request, queryset, self)
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                serializer.to_representation(page)
+            )
+        return Response(serializer.to_representation(queryset))
+
+
+class NestedParentMixin:
+    """Родитель вложенного маршрута, проверенный один раз за запрос.
+
+    `parent_field` - поле модели представления, ссылающееся на родителя,
+    `parent_lookups` - аргумент URL -> фильтр по модели представления,
+    например `{'review_id': 'review_id', 'title_id': 'review__title_id'}`.
+    Для списка и создания родитель загружается одним запросом с проверкой
+    всей цепочки, у отдельного объекта цепочка проверяется в том же
+    запросе, что и сам объект, а родитель берётся из него.
+    """
+
+    parent_field = None
+    parent_lookups = {}
+
+    def get_parent_filters(self):
+        return {
+            lookup: self.kwargs[kwarg]
+            for kwarg, lookup in self.parent_lookups.items()
+        }
+
+    def get_parent_field(self):
+        return self.queryset.model._meta.get_field(self.parent_field)
+
+    def get_parent(self):
+        if not hasattr(self, '_parent'):
+            field = self.get_parent_field()
+            prefix = f'{self.parent_field}__'
+            filters = {}
+            for lookup, value in self.get_parent_filters().items():
+                if lookup == field.attname:
+                    filters['pk'] = value
+                else:
+                    filters[lookup[len(prefix):]] = value
+            self._parent = get_object_or_404(field.related_model, **filters)
+        return self._parent
+
+    def is_detail(self):
+        return (self.lookup_url_kwarg or self.lookup_field) in self.kwargs
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.is_detail():
+            return queryset.filter(**self.get_parent_filters())\
+                .select_related(self.parent_field)
+        accessor = self.get_parent_field().remote_field.get_accessor_name()
+        return getattr(self.get_parent(), accessor).all()
+
+    def get_object(self):
+        obj = super().get_object()
+        field = self.get_parent_field()
+        if field.is_cached(obj):
+            self._parent = field.get_cached_value(obj)
+        return obj
@@ -0,0 +1,117 @@
+"""Отправка писем через очередь в БД.
+
+Представления не отправляют почту сами: enqueue() добавляет письмо в
+таблицу OutboxEmail в той же транзакции, что и изменения, ради которых
+оно пишется, поэтому письмо уходит, только если они сохранены. Команда
+manage.py run_outbox отправляет накопленные письма пачками по
+`OUTBOX_BATCH_SIZE` через одно соединение с почтовым сервером.
+
+Пачка занимается на `OUTBOX_LEASE` секунд, так что несколько
+обработчиков не отправят письмо дважды, а письма упавшего обработчика
+после этого срока отправит другой. Письмо с ошибкой отправки
+повторяется с удвоением задержки от `OUTBOX_RETRY_DELAY` до
+`OUTBOX_MAX_RETRY_DELAY` секунд; после `OUTBOX_MAX_ATTEMPTS` попыток
+оно остаётся в таблице с текстом последней ошибки.
+"""
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
+from django.utils import timezone
+
+from reviews.models import OutboxEmail
+
+
+def enqueue(subject, body, recipient, from_email=None):
+    """Письмо в очередь; вызывается в транзакции изменений."""
+
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        recipient=recipient,
+        from_email=from_email or settings.EMAIL_HOST_USER,
+    )
+
+
+def retry_delay(attempts):
+    """Задержка перед повтором после attempts неудачных попыток."""
+
+    delay = getattr(settings, 'OUTBOX_RETRY_DELAY', 30) * 2 ** (attempts - 1)
+    return timedelta(
+        seconds=min(delay, getattr(settings, 'OUTBOX_MAX_RETRY_DELAY', 3600))
+    )
+
+
+def claim(batch_size):
+    """Письма, готовые к отправке, занятые на `OUTBOX_LEASE` секунд.
+
+    Письма занимаются одним условным UPDATE без блокировок строк, которых
+    нет в SQLite: новое send_after служит меткой обработчика, и он
+    отправляет только письма с этой меткой. Письмо, занятое другим
+    обработчиком между чтением и UPDATE, условию уже не соответствует.
+    """
+
+    now = timezone.now()
+    ready = OutboxEmail.objects.filter(
+        sent__isnull=True,
+        send_after__lte=now,
+        attempts__lt=getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 10),
+    )
+    pks = list(
+        ready.order_by('send_after').values_list('pk', flat=True)[:batch_size]
+    )
+    if not pks:
+        return []
+    lease = now + timedelta(
+        seconds=getattr(settings, 'OUTBOX_LEASE', 300),
+        microseconds=random.randrange(1000000)
+    )
+    if not ready.filter(pk__in=pks).update(send_after=lease):
+        return []
+    return list(OutboxEmail.objects.filter(pk__in=pks, send_after=lease))
+
+
+def deliver(emails, connection):
+    """Отправляет письма через одно соединение; возвращает (pk, ошибка).
+
+    После ошибки соединение открывается заново для следующего письма.
+    """
+
+    sent, failed = [], []
+    try:
+        for email in emails:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email,
+                [email.recipient], connection=connection
+            )
+            try:
+                connection.open()
+                connection.send_messages([message])
+            except Exception as error:
+                failed.append((email, error))
+                connection.close()
+            else:
+                sent.append(email.pk)
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def process_batch(batch_size):
+    """Отправляет одну пачку писем; возвращает (отправлено, ошибок)."""
+
+    emails = claim(batch_size)
+    if not emails:
+        return 0, 0
+    sent, failed = deliver(emails, get_connection())
+    now = timezone.now()
+    OutboxEmail.objects.filter(pk__in=sent).update(sent=now)
+    for email, error in failed:
+        OutboxEmail.objects.filter(pk=email.pk).update(
+            attempts=F('attempts') + 1,
+            send_after=now + retry_delay(email.attempts + 1),
+            last_error=repr(error),
+        )
+    return len(sent), len(failed)
@@ -0,0 +1,69 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class KeysetPagination(CursorPagination):
+    """Курсорная пагинация по полю `ordering` представления.
+
+    Страница выбирается условием по индексированному полю без OFFSET и без
+    запроса COUNT(*), поэтому время ответа не зависит от глубины страницы.
+    Поля, допускающие NULL, не годятся для позиции курсора: сортировка
+    по ним из `?ordering=` отбрасывается, а без других полей действует
+    сортировка представления.
+    """
+
+    ordering = ('-pk',)
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = getattr(view, 'ordering', None)
+        if ordering:
+            self.ordering = ordering
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(
+            field for field in super().get_ordering(request, queryset, view)
+            if not self.is_nullable(queryset.model, field.lstrip('-'))
+        )
+        return ordering or self.ordering
+
+    def is_nullable(self, model, name):
+        try:
+            return model._meta.get_field(name).null
+        except FieldDoesNotExist:
+            return False
+
+
+class LimitOffsetOrCursorPagination(LimitOffsetPagination):
+    """Пагинация limit/offset с включаемым курсорным режимом.
+
+    Курсорный режим включается параметром `?pagination=cursor`, дальше
+    клиент переходит по ссылкам `next`/`previous` с параметром `cursor`.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_paginator_class = KeysetPagination
+    cursor_paginator = None
+
+    def is_cursor_mode(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_paginator_class.cursor_query_param
+            in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_mode(request):
+            self.cursor_paginator = self.cursor_paginator_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        self.cursor_paginator = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
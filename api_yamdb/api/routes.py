@@ -0,0 +1,26 @@
+def get_route(request):
+    """Имя маршрута и действие обработанного запроса.
+
+    Для ViewSet это basename из api/urls.py и действие, для представлений
+    `@api_view` - имя функции и None. Без представления DRF - (None, None).
+    """
+
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None, None
+    view = match.func
+    actions = getattr(view, 'actions', None)
+    if actions:
+        return (
+            view.initkwargs.get('basename'),
+            actions.get(request.method.lower())
+        )
+    if getattr(view, 'cls', None) is None:
+        return None, None
+    return view.__name__, None
+
+
+def get_route_name(request):
+    """`<basename>.<action>` для ViewSet, имя функции для `@api_view`."""
+
+    return '.'.join(filter(None, get_route(request))) or None
@@ -1,11 +1,18 @@
 # import re
 
 # from django.core.exceptions import ValidationError
+from django.db.models import (
+    Manager, Prefetch, Q, prefetch_related_objects
+)
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
-from reviews.models import Category, Genre, Title, Review, Comment, User
+from reviews.models import (Category, Genre, Title, Review, Comment, User,
+                            ScoreDistribution)
 from reviews.validators import validate_me, validate_year
+from . import fragments
+from .expand import ExpandSerializerMixin
+from .fieldsets import SparseFieldsSerializerMixin
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -24,18 +31,90 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ('name', 'slug',)
 
 
-class TitleSerializer(serializers.ModelSerializer):
+def genre_prefetch():
+    """Жанры произведения в порядке их назначения."""
+
+    return Prefetch('genre', queryset=Genre.objects.order_by('genretitle__id'))
+
+
+class TitleListSerializer(serializers.ListSerializer):
+    """Список произведений с жанрами всех произведений одним запросом.
+
+    Обычные списки отдаёт FastTitleListSerializer, этот нужен для
+    `?score_distribution`.
+    """
+
+    def to_representation(self, data):
+        titles = list(data.all() if isinstance(data, Manager) else data)
+        self.child.prefetch_genres(titles)
+        return super().to_representation(titles)
+
+
+class TitleSerializer(ExpandSerializerMixin, SparseFieldsSerializerMixin,
+                      serializers.ModelSerializer):
     """Сериализатор произведений."""
 
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
-    rating = serializers.IntegerField(
-        source='reviews__score__avg', read_only=True
-    )
+    rating = serializers.IntegerField(read_only=True)
+    review_count = serializers.IntegerField(read_only=True)
+    score_distribution = serializers.SerializerMethodField()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if (request is None
+                or 'score_distribution' not in request.query_params):
+            self.fields.pop('score_distribution', None)
+
+    def get_score_distribution(self, obj):
+        try:
+            return obj.score_distribution.as_dict()
+        except ScoreDistribution.DoesNotExist:
+            return ScoreDistribution(title=obj).as_dict()
+
+    def get_expand_serializers(self):
+        return {'reviews': ReviewSerializer}
+
+    def use_fragment_cache(self):
+        return (self.context.get('fragment_stamp') is not None
+                and not self.sparse and not self.context.get('expand')
+                and 'score_distribution' not in self.fields)
+
+    def prefetch_genres(self, titles):
+        if 'genre' in self.fields:
+            prefetch_related_objects(titles, genre_prefetch())
+
+    def to_representation(self, instance):
+        if self.parent is not None:
+            return super().to_representation(instance)
+        if not self.use_fragment_cache():
+            self.prefetch_genres([instance])
+            return super().to_representation(instance)
+        stamp = self.context['fragment_stamp']
+        cached = fragments.get_fragments([instance.pk], stamp)
+        if instance.pk not in cached:
+            self.prefetch_genres([instance])
+            cached[instance.pk] = super().to_representation(instance)
+            fragments.set_fragments(cached, stamp)
+        return cached[instance.pk]
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = ('score_sum',)
+        list_serializer_class = TitleListSerializer
+
+
+class ScoreDistributionSerializer(serializers.ModelSerializer):
+    """Сериализатор гистограммы оценок произведения."""
+
+    score_distribution = serializers.DictField(
+        source='as_dict', child=serializers.IntegerField(), read_only=True
+    )
+
+    class Meta:
+        model = ScoreDistribution
+        fields = ('title', 'score_distribution',)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -84,13 +163,12 @@ class UserSingUpSerializer(serializers.Serializer):
         username = data.get('username')
         email = data.get('email')
 
-        if User.objects.filter(username=username).exists()\
-                and not User.objects.filter(email=email).exists():
-            raise serializers.ValidationError(
-                'Пользователь зарегистрирован с другой почтой'
-            )
-        if User.objects.filter(email=email).exists()\
-                and not User.objects.filter(username=username).exists():
+        # Одним запросом: повторная регистрация допустима только с той же
+        # парой имени и почты.
+        pairs = User.objects.filter(
+            Q(username=username) | Q(email=email)
+        ).values_list('username', 'email')[:2]
+        if any(pair != (username, email) for pair in pairs):
             raise serializers.ValidationError(
                 'Пользователь зарегистрирован с другой почтой'
             )
@@ -111,12 +189,43 @@ class UserGetTokenSerializer(serializers.ModelSerializer):
         )
 
 
+class SlugListField(serializers.ManyRelatedField):
+    """Список slug, все объекты ищутся одним запросом.
+
+    SlugRelatedField(many=True) делает отдельный запрос на каждый slug.
+    """
+
+    def __init__(self, slug_field, queryset, **kwargs):
+        super().__init__(
+            child_relation=serializers.SlugRelatedField(
+                slug_field=slug_field, queryset=queryset
+            ),
+            **kwargs
+        )
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        relation = self.child_relation
+        slugs = [str(slug) for slug in data]
+        found = relation.get_queryset().in_bulk(
+            slugs, field_name=relation.slug_field
+        )
+        for slug in slugs:
+            if slug not in found:
+                relation.fail(
+                    'does_not_exist', slug_name=relation.slug_field,
+                    value=slug
+                )
+        return [found[slug] for slug in slugs]
+
+
 class TitleCreateAndUpdateSerializer(serializers.ModelSerializer):
     """Сериализатор создания или редактирования произведения."""
 
-    genre = serializers.SlugRelatedField(
-        slug_field='slug', many=True, queryset=Genre.objects.all()
-    )
+    genre = SlugListField(slug_field='slug', queryset=Genre.objects.all())
     category = serializers.SlugRelatedField(
         slug_field='slug', queryset=Category.objects.all()
     )
@@ -124,10 +233,12 @@ class TitleCreateAndUpdateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = ('score_sum',)
+        read_only_fields = ('rating', 'review_count')
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(ExpandSerializerMixin, SparseFieldsSerializerMixin,
+                       serializers.ModelSerializer):
     """Сериализатор отзывов."""
 
     author = serializers.SlugRelatedField(
@@ -138,16 +249,24 @@ class ReviewSerializer(serializers.ModelSerializer):
     def get_author(self, obj):
         return obj.author.username
 
+    def get_expand_serializers(self):
+        return {'comments': CommentSerializer}
+
     class Meta:
         model = Review
-        fields = ['id', 'title', 'author', 'text', 'score', 'pub_date']
+        fields = [
+            'id', 'title', 'author', 'text', 'score', 'pub_date',
+            'comment_count',
+        ]
+        read_only_fields = ('comment_count',)
         extra_kwargs = {
             'title': {'required': False},
             'count': {'required': False},
         }
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsSerializerMixin,
+                        serializers.ModelSerializer):
     """Сериализатор комментариев к отзывам."""
 
     author = serializers.SlugRelatedField(
@@ -0,0 +1,108 @@
+"""Префиксный индекс для подсказок в строке поиска.
+
+Индекс живёт в памяти процесса: отсортированный список ключей, по которому
+диапазон совпадений с префиксом находится двоичным поиском. Запросы к БД
+выполняются только при перестроении индекса: список каждого типа
+перестраивается, когда меняется версия его коллекции (см. api.versions).
+"""
+import threading
+from bisect import bisect_left
+from types import MappingProxyType
+
+from reviews.models import Category, Genre, Title
+from .versions import get_versions
+
+KINDS = ('titles', 'genres', 'categories')
+
+
+def normalize(text):
+    return ' '.join(text.lower().replace('ё', 'е').split())
+
+
+def load_titles():
+    return [
+        (name, {'id': pk, 'name': name})
+        for pk, name in Title.objects.values_list('pk', 'name')
+    ]
+
+
+def load_slugs(model):
+    return [
+        (name, {'name': name, 'slug': slug})
+        for name, slug in model.objects.values_list('name', 'slug')
+    ]
+
+
+LOADERS = {
+    'titles': load_titles,
+    'genres': lambda: load_slugs(Genre),
+    'categories': lambda: load_slugs(Category),
+}
+
+
+class PrefixIndex:
+    """Отсортированные по ключу списки объектов каждого типа.
+
+    Ключи строятся от начала каждого слова в названии, поэтому
+    `отец` находит «Крестный отец». Списки хранятся в одном неизменяемом
+    словаре {тип: (версия, ключи, объекты)}, который заменяется одним
+    присваиванием: поиск в другом потоке не увидит ключи нового индекса
+    вместе с объектами старого.
+    """
+
+    def __init__(self):
+        self.indexes = MappingProxyType(
+            {kind: (None, (), ()) for kind in KINDS}
+        )
+        self.lock = threading.Lock()
+
+    def build(self, kind):
+        rows = []
+        for position, (name, payload) in enumerate(LOADERS[kind]()):
+            words = normalize(name).split(' ')
+            for key in {' '.join(words[i:]) for i in range(len(words))}:
+                rows.append((key, position, payload))
+        rows.sort(key=lambda row: row[:2])
+        return (
+            tuple(row[0] for row in rows),
+            tuple((row[1], row[2]) for row in rows),
+        )
+
+    def ensure_fresh(self):
+        """Индекс, в котором перестроены устаревшие списки."""
+
+        versions = dict(zip(KINDS, get_versions(KINDS)[0]))
+        indexes = self.indexes
+        if all(indexes[kind][0] == versions[kind] for kind in KINDS):
+            return indexes
+        with self.lock:
+            indexes = dict(self.indexes)
+            for kind in KINDS:
+                if indexes[kind][0] != versions[kind]:
+                    indexes[kind] = (versions[kind], *self.build(kind))
+            self.indexes = MappingProxyType(indexes)
+            return self.indexes
+
+    def lookup(self, prefix, limit):
+        """Первые `limit` объектов каждого типа с ключом на `prefix`."""
+
+        prefix = normalize(prefix)
+        result = {kind: [] for kind in KINDS}
+        if not prefix:
+            return result
+        indexes = self.ensure_fresh()
+        for kind in KINDS:
+            _, keys, entries = indexes[kind]
+            seen = set()
+            index = bisect_left(keys, prefix)
+            while (index < len(keys) and len(seen) < limit
+                   and keys[index].startswith(prefix)):
+                position, payload = entries[index]
+                if position not in seen:
+                    seen.add(position)
+                    result[kind].append(payload)
+                index += 1
+        return result
+
+
+suggest_index = PrefixIndex()
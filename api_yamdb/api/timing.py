@@ -0,0 +1,122 @@
+"""Разбивка времени ответа для заголовка Server-Timing.
+
+Части ответа:
+
+- `db` - все SQL-запросы, в описании их число;
+- `auth` - аутентификация;
+- `perm` - проверка прав доступа;
+- `serialize` - обработчик действия без SQL, то есть в основном
+  `get_serializer().data`;
+- `render` - рендеринг ответа;
+- `total` - весь запрос.
+
+Части не пересекаются: время SQL и вложенных частей вычитается из
+объемлющей, например проверка прав объекта внутри обработчика попадает
+в perm, а не в serialize. Части auth, perm и serialize записывает
+ServerTimingMixin, остальные - ServerTimingMiddleware.
+"""
+import time
+from contextlib import contextmanager, nullcontext
+
+PHASES = ('db', 'auth', 'perm', 'serialize', 'render', 'total')
+
+
+class ServerTiming:
+    """Время частей одного запроса в секундах."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = dict.fromkeys(PHASES, 0.0)
+        self.queries = 0
+        self.marks = {}
+        # Время, уже отнесённое к db и завершённым частям.
+        self.accounted = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка connection.execute_wrapper: время SQL-запросов."""
+
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add('db', time.perf_counter() - start)
+            self.queries += 1
+
+    def add(self, name, duration):
+        self.durations[name] += duration
+        self.accounted += duration
+
+    def start(self, name):
+        self.marks[name] = (time.perf_counter(), self.accounted)
+
+    def stop(self, name):
+        if name not in self.marks:
+            return
+        started, accounted = self.marks.pop(name)
+        self.add(
+            name,
+            time.perf_counter() - started - (self.accounted - accounted)
+        )
+
+    @contextmanager
+    def span(self, name):
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(name)
+
+    def finish(self):
+        self.durations['total'] = time.perf_counter() - self.started
+
+    def milliseconds(self):
+        return {
+            name: round(duration * 1000, 3)
+            for name, duration in self.durations.items()
+        }
+
+    def header(self):
+        parts = []
+        for name, duration in self.milliseconds().items():
+            part = f'{name};dur={duration}'
+            if name == 'db':
+                part += f';desc="{self.queries} queries"'
+            parts.append(part)
+        return ', '.join(parts)
+
+
+def span(request, name):
+    """Замер части name, если для запроса включён Server-Timing."""
+
+    timing = getattr(request, 'server_timing', None)
+    if timing is None:
+        return nullcontext()
+    return timing.span(name)
+
+
+class ServerTimingMixin:
+    """Время аутентификации, проверки прав и обработчика действия."""
+
+    def perform_authentication(self, request):
+        with span(request, 'auth'):
+            super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        with span(request, 'perm'):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with span(request, 'perm'):
+            super().check_object_permissions(request, obj)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        timing = getattr(request, 'server_timing', None)
+        if timing is not None:
+            timing.start('serialize')
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        timing = getattr(request, 'server_timing', None)
+        if timing is not None:
+            timing.stop('serialize')
+        return super().finalize_response(request, response, *args, **kwargs)
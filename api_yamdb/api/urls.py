@@ -30,5 +30,6 @@ router.register(r'users', views.UserViewSet, basename='users')
 urlpatterns = [
     path('v1/auth/signup/', views.user_signup),
     path('v1/auth/token/', views.get_token),
+    path('v1/suggest/', views.suggest),
     path('v1/', include(router.urls)),
 ]
@@ -0,0 +1,123 @@
+"""Версии коллекций ресурсов для валидаторов ETag / Last-Modified.
+
+Версия коллекции хранится в общем для всех процессов кэше Django и
+заменяется временем в наносекундах после фиксации каждой транзакции,
+записавшей в её модель. Новое значение, а не incr, не теряет
+одновременных изменений в кэшах без атомарного incr и не совпадает с
+выданными клиентам версиями после очистки кэша. Команды, переписывающие
+данные в обход сигналов моделей, отправляют сигнал data_rebuilt.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import (
+    Category, Comment, Genre, GenreTitle, Review, Title, User
+)
+from reviews.signals import data_rebuilt
+
+COLLECTIONS = {
+    Title: 'titles',
+    Genre: 'genres',
+    Category: 'categories',
+    Review: 'reviews',
+    Comment: 'comments',
+    GenreTitle: 'titles',
+}
+
+
+def version_key(name):
+    return f'version:{name}'
+
+
+def modified_key(name):
+    return f'modified:{name}'
+
+
+def bump(*names):
+    """Новые версии коллекций после фиксации текущей транзакции.
+
+    До фиксации другие процессы ещё читают старые данные и сохранили бы
+    их в кэше под новой версией.
+    """
+
+    def write():
+        modified = time.time()
+        values = {}
+        for name in names:
+            values[version_key(name)] = time.time_ns()
+            values[modified_key(name)] = modified
+        cache.set_many(values, timeout=None)
+    transaction.on_commit(write)
+
+
+def get_versions(names):
+    """Версии и время последнего изменения коллекций одним обращением.
+
+    Возвращает кортеж версий в порядке `names` и наибольшее время
+    изменения (или None, если оно неизвестно).
+    """
+
+    versions, modified, _ = get_versions_with(names, ())
+    return versions, modified
+
+
+def get_versions_with(names, keys):
+    """То же и значения ключей кэша `keys` тем же обращением.
+
+    Третьим элементом возвращается словарь найденных ключей `keys`.
+    """
+
+    version_keys = [version_key(name) for name in names]
+    values = cache.get_many(
+        [*version_keys, *(modified_key(name) for name in names), *keys]
+    )
+    for key in version_keys:
+        if key not in values:
+            cache.add(key, time.time_ns(), timeout=None)
+            values[key] = cache.get(key)
+    modified = [
+        values[modified_key(name)] for name in names
+        if modified_key(name) in values
+    ]
+    return (
+        tuple(values[key] for key in version_keys),
+        max(modified) if modified else None,
+        {key: values[key] for key in keys if key in values}
+    )
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def model_changed(sender, **kwargs):
+    name = COLLECTIONS.get(sender)
+    if name is not None:
+        bump(name)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    """Отзывы и комментарии показывают имя автора."""
+
+    if created or (update_fields is not None
+                   and 'username' not in update_fields):
+        return
+    loaded = getattr(instance, '_loaded_values', {})
+    if loaded.get('username') != instance.username:
+        bump('reviews', 'comments')
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def title_genres_changed(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump('titles')
+
+
+@receiver(data_rebuilt)
+def data_rebuilt_received(sender, models, **kwargs):
+    names = {COLLECTIONS[model] for model in models if model in COLLECTIONS}
+    if names:
+        bump(*sorted(names))
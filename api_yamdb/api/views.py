@@ -1,24 +1,37 @@
 from random import randint
 
-from django.core.mail import send_mail
-from django.db import IntegrityError
-from django.db.models import Avg
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, mixins, status, filters
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from reviews.models import Category, Genre, Title, Review, Comment, User
-from . import serializers
+from reviews.models import (Category, Genre, Title, Review, Comment, User,
+                            ScoreDistribution)
+from . import fragments, outbox, serializers
+from .bulk import BulkTitleSerializer
+from .expand import ExpandViewMixin, limited_prefetch
+from .fast_serializers import FastTitleListSerializer
+from .fieldsets import SparseFieldsViewMixin
+from .filters import FullTextSearchFilter
+from .metrics import CONTENT_TYPE, is_allowed, render
+from .mixins import (CachedListMixin, ConditionalRetrieveMixin,
+                     FastListMixin, NestedParentMixin)
+from .pagination import LimitOffsetOrCursorPagination
 from .permissions import (AdminOnly, Author,
                           Moderator, OnlyRead)
+from .suggest import suggest_index
+from .timing import ServerTimingMixin
 
 
 class ListDestroyCreateWithFilters(
+    ServerTimingMixin,
+    CachedListMixin,
     viewsets.GenericViewSet,
     mixins.ListModelMixin,
     mixins.DestroyModelMixin,
@@ -36,6 +49,7 @@ class CategoryViewSet(ListDestroyCreateWithFilters):
 
     queryset = Category.objects.all()
     serializer_class = serializers.CategorySerializer
+    conditional_collections = ('categories',)
 
 
 class GenreViewSet(ListDestroyCreateWithFilters):
@@ -43,24 +57,74 @@ class GenreViewSet(ListDestroyCreateWithFilters):
 
     queryset = Genre.objects.all()
     serializer_class = serializers.GenreSerializer
+    conditional_collections = ('genres',)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ServerTimingMixin, ExpandViewMixin,
+                   ConditionalRetrieveMixin, FastListMixin,
+                   SparseFieldsViewMixin, viewsets.ModelViewSet):
     """Представление произведений."""
 
-    queryset = Title.objects.all().annotate(Avg('reviews__score')).\
-        select_related('category').prefetch_related('genre')
+    queryset = Title.objects.all().select_related('category')
     serializer_class = serializers.TitleSerializer
+    lookup_value_regex = r'\d+'
+    fast_list_serializer_class = FastTitleListSerializer
     permission_classes = (OnlyRead | AdminOnly,)
-    filter_backends = (DjangoFilterBackend, filters.OrderingFilter)
+    filter_backends = (DjangoFilterBackend, filters.OrderingFilter,
+                       FullTextSearchFilter)
     filterset_fields = ('name', 'year', 'category__slug', 'genre__slug',)
-    ordering_fields = ['name', 'year']
+    ordering_fields = ['name', 'year', 'rating', 'review_count']
+    ordering = ('id',)
+    conditional_collections = ('titles', 'genres', 'categories', 'reviews')
+    sparse_fields = {
+        'id': (),
+        'genre': (),
+        'category': ('category__name', 'category__slug'),
+        'rating': ('rating',),
+        'review_count': ('review_count',),
+        'name': ('name',),
+        'year': ('year',),
+        'description': ('description',),
+        'score_distribution': (),
+    }
+    sparse_select_related = {
+        'category': 'category',
+        'score_distribution': 'score_distribution',
+    }
+    expand_actions = ('retrieve',)
+    expand_collections = {
+        'reviews': 'reviews',
+        'reviews.comments': 'comments',
+    }
 
     def get_serializer_class(self):
         if self.request.method in ('POST', 'PATCH'):
             return serializers.TitleCreateAndUpdateSerializer
         return serializers.TitleSerializer
 
+    def use_fast_list(self, request):
+        return (super().use_fast_list(request)
+                and 'score_distribution' not in request.query_params)
+
+    def get_fast_list_serializer(self):
+        return self.fast_list_serializer_class(
+            fields=self.get_sparse_fields(), stamp=self.get_fragment_stamp()
+        )
+
+    def get_fragment_stamp(self):
+        """Штамп фрагментов из версий, прочитанных до запросов к БД."""
+
+        if not hasattr(self, 'collection_versions'):
+            return None
+        return fragments.get_stamp(dict(zip(
+            self.get_conditional_collections(), self.collection_versions
+        )))
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fragment_stamp'] = self.get_fragment_stamp()
+        return context
+
     def get_queryset(self):
         queryset = super().get_queryset()
         genre_slug = self.request.query_params.get('genre')
@@ -69,88 +133,152 @@ class TitleViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(genre__slug=genre_slug)
         if category_slug:
             queryset = queryset.filter(category__slug=category_slug)
-        return queryset
+        if 'score_distribution' in self.request.query_params:
+            queryset = queryset.select_related('score_distribution')
+        return self.expand_queryset(queryset)
+
+    def get_expand_prefetches(self, expand):
+        prefetches = [limited_prefetch(
+            'reviews', Review.objects.select_related('author'), 'title',
+            self.get_expand_limit('reviews'), ('-pub_date', '-id')
+        )]
+        if 'reviews.comments' in expand:
+            prefetches.append(limited_prefetch(
+                'comments', Comment.objects.select_related('author'),
+                'review', self.get_expand_limit('comments'),
+                ('-pub_date', '-id'), through='expanded_reviews'
+            ))
+        return prefetches
+
+    @action(methods=['POST'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        serializer = BulkTitleSerializer(
+            data=request.data, many=True,
+            context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        created = any('id' not in item for item in serializer.validated_data)
+        titles = serializer.save()
+        positions = {title.pk: index for index, title in enumerate(titles)}
+        fast_serializer = FastTitleListSerializer()
+        rows = sorted(
+            fast_serializer.get_queryset(
+                Title.objects.filter(pk__in=positions)
+            ),
+            key=lambda row: positions[row['id']]
+        )
+        return Response(fast_serializer.to_representation(rows),
+                        status=(status.HTTP_201_CREATED if created
+                                else status.HTTP_200_OK))
+
+    @action(methods=['GET'], detail=True, url_path='stats')
+    def stats(self, request, pk=None):
+        distribution = ScoreDistribution.objects.filter(title_id=pk).first()
+        if distribution is None:
+            distribution = ScoreDistribution(
+                title=get_object_or_404(Title, pk=pk)
+            )
+        serializer = serializers.ScoreDistributionSerializer(distribution)
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ServerTimingMixin, ExpandViewMixin,
+                    ConditionalRetrieveMixin, SparseFieldsViewMixin,
+                    NestedParentMixin, viewsets.ModelViewSet):
     """Представление отзывов."""
 
     queryset = Review.objects.all()
     serializer_class = serializers.ReviewSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = LimitOffsetOrCursorPagination
+    ordering = ('-pub_date',)
+    filter_backends = (filters.OrderingFilter,)
+    ordering_fields = ('pub_date', 'score', 'comment_count')
     permission_classes = (OnlyRead | Author | AdminOnly
                           | Moderator,)
+    conditional_collections = ('reviews', 'titles', 'comments')
+    sparse_fields = {
+        'id': (),
+        'title': ('title',),
+        'author': ('author__username',),
+        'text': ('text',),
+        'score': ('score',),
+        'pub_date': ('pub_date',),
+        'comment_count': ('comment_count',),
+    }
+    sparse_select_related = {'author': 'author'}
+    expand_actions = ('list', 'retrieve')
+    expand_collections = {'comments': 'comments'}
+    parent_field = 'title'
+    parent_lookups = {'title_id': 'title_id'}
 
     def get_queryset(self):
-        title = get_object_or_404(Title, id=self.kwargs['title_id'])
-        return title.reviews.all()
+        return self.expand_queryset(
+            super().get_queryset().select_related('author')
+        )
 
-    def create(self, request, *args, **kwargs):
-        title = get_object_or_404(Title, id=self.kwargs['title_id'])
-        user = request.user
+    def get_expand_prefetches(self, expand):
+        return [limited_prefetch(
+            'comments', Comment.objects.select_related('author'), 'review',
+            self.get_expand_limit('comments'), ('-pub_date', '-id')
+        )]
 
-        if Review.objects.filter(author=user, title=title).exists():
+    def create(self, request, *args, **kwargs):
+        title = self.get_parent()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        # Повторный отзыв отсекает ограничение unique_review, Review.save
+        # выполняется в своей транзакции - отдельный exists() не нужен.
+        try:
+            serializer.save(author=request.user, title=title)
+        except IntegrityError:
             return Response(
                 {'detail': 'Отзыв уже оставлен!'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        serializer.save(author=user, title=title)
-
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data,
                         status=status.HTTP_201_CREATED,
                         headers=headers)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ServerTimingMixin, ConditionalRetrieveMixin,
+                     SparseFieldsViewMixin, NestedParentMixin,
+                     viewsets.ModelViewSet):
     """Представление комментов к отзыву."""
 
     queryset = Comment.objects.all()
     serializer_class = serializers.CommentSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = LimitOffsetOrCursorPagination
+    ordering = ('-pub_date',)
     permission_classes = (OnlyRead | Author | AdminOnly
                           | Moderator,)
+    conditional_collections = ('comments', 'reviews')
+    sparse_fields = {
+        'id': (),
+        'text': ('text',),
+        'author': ('author__username',),
+        'pub_date': ('pub_date',),
+    }
+    sparse_select_related = {'author': 'author'}
+    parent_field = 'review'
+    parent_lookups = {'review_id': 'review_id', 'title_id': 'review__title_id'}
 
     def get_queryset(self):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs['review_id'],
-            title__id=self.kwargs['title_id']
-        )
-        return review.comments.all()
+        return super().get_queryset().select_related('author')
 
     def perform_create(self, serializer):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs['review_id'],
-            title__id=self.kwargs['title_id']
-        )
-        serializer.save(author=self.request.user, review=review)
-
-    def create(self, request, *args, **kwargs):
-        review_id = self.kwargs['review_id']
-        review = get_object_or_404(Review, id=review_id)
-        serializer = self.get_serializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        serializer.save(author=request.user, review=review)
-        headers = self.get_success_headers(serializer.data)
-        return Response(
-            serializer.data,
-            status=status.HTTP_201_CREATED,
-            headers=headers
-        )
+        serializer.save(author=self.request.user, review=self.get_parent())
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ServerTimingMixin, viewsets.ModelViewSet):
     """Представление пользователей."""
 
     queryset = User.objects.all()
     serializer_class = serializers.UserSerializer
     permission_classes = (AdminOnly,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = LimitOffsetOrCursorPagination
+    ordering = ('id',)
     filter_backends = (DjangoFilterBackend, filters.SearchFilter,)
     search_fields = ('username',)
     lookup_field = 'username'
@@ -192,24 +320,43 @@ def user_signup(request):
     email = serializer.data['email']
     confirmation_code = randint(10000, 99999)
     try:
-        user, _ = User.objects.get_or_create(
-            username=username,
-            email=email,
-        )
+        with transaction.atomic():
+            user, created = User.objects.get_or_create(
+                username=username,
+                email=email,
+                defaults={'confirmation_code': confirmation_code},
+            )
+            if not created:
+                user.confirmation_code = confirmation_code
+                user.save(update_fields=['confirmation_code'])
+            # Письмо отправит manage.py run_outbox, см. api/outbox.py.
+            outbox.enqueue(subject='confirmation_code',
+                           body=f'Код: {confirmation_code}',
+                           recipient=email)
     except IntegrityError:
         return Response('Указанные данные не корректны',
                         status=status.HTTP_400_BAD_REQUEST)
-    user.confirmation_code = confirmation_code
-    user.save()
-    send_mail(subject='confirmation_code',
-              message=f'Код: {confirmation_code}',
-              from_email='yambd@gmail.com',
-              recipient_list=[email])
 
     return Response(serializer.data,
                     status=status.HTTP_200_OK)
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def suggest(request):
+    """Подсказки по началу названия произведения, жанра или категории."""
+
+    try:
+        limit = min(int(request.query_params.get('limit', 10)), 50)
+    except ValueError:
+        return Response({'limit': 'Ожидается целое число.'},
+                        status=status.HTTP_400_BAD_REQUEST)
+    return Response(
+        suggest_index.lookup(request.query_params.get('prefix', ''), limit),
+        status=status.HTTP_200_OK
+    )
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def get_token(request):
@@ -225,3 +372,13 @@ def get_token(request):
     else:
         return Response({'confirmation_code': 'Неверный код подтверждения!'},
                         status=status.HTTP_400_BAD_REQUEST)
+
+
+def metrics(request):
+    """Метрики всех процессов в текстовом формате Prometheus."""
+
+    if not is_allowed(request.META.get('REMOTE_ADDR')):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render(settings.METRICS_DIR), content_type=CONTENT_TYPE
+    )
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
@@ -30,6 +31,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.fingerprints.SqlFingerprintMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -37,8 +40,43 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.QueryBudgetMiddleware',
+    'api.middleware.ServerTimingMiddleware',
 ]
 
+# Проверка бюджетов SQL-запросов действий API, см. api/budgets.py.
+# Включается переменной окружения ENFORCE_QUERY_BUDGETS=1, в тестах -
+# всегда.
+ENFORCE_QUERY_BUDGETS = os.environ.get('ENFORCE_QUERY_BUDGETS') == '1'
+
+# Заголовок Server-Timing с разбивкой времени ответа, см. api/timing.py.
+# Доля ответов SERVER_TIMING_LOG_SAMPLE_RATE пишется в лог api.timing.
+SERVER_TIMING = False
+SERVER_TIMING_LOG_SAMPLE_RATE = 0.0
+
+# Папка файлов метрик процессов для /metrics, см. api/metrics.py.
+# Пустое значение (по умолчанию) отключает сбор метрик.
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+# Адреса и сети, которым доступен /metrics, например сервер Prometheus:
+# через запятую в переменной окружения METRICS_ALLOWED_IPS. По умолчанию
+# пусто. Адрес берётся из REMOTE_ADDR: за обратным прокси на том же
+# хосте все запросы приходят с 127.0.0.1, поэтому адреса loopback
+# указывайте, только если /metrics не проксируется наружу.
+METRICS_ALLOWED_IPS = [
+    network.strip() for network in os.environ.get(
+        'METRICS_ALLOWED_IPS', ''
+    ).split(',') if network.strip()
+]
+
+# Отпечатки SQL-запросов для поиска N+1 и медленных запросов, см.
+# api/fingerprints.py и manage.py sqlreport. Включаются переменной
+# окружения SQL_FINGERPRINTS=1, в продакшене - выборка доли
+# SQL_FINGERPRINTS_SAMPLE_RATE ответов. Нужна папка METRICS_DIR.
+SQL_FINGERPRINTS = os.environ.get('SQL_FINGERPRINTS') == '1'
+SQL_FINGERPRINTS_SAMPLE_RATE = 0.0
+SQL_REPEAT_THRESHOLD = 3
+SQL_SLOW_MS = 100
+
 ROOT_URLCONF = 'api_yamdb.urls'
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
@@ -70,6 +108,27 @@ DATABASES = {
     }
 }
 
+# Общий для всех процессов сервиса кэш: версии коллекций, списки и
+# фрагменты произведений, см. api/versions.py. По умолчанию - файлы во
+# временной папке системы, в продакшене - memcached или Redis, например
+# CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache и
+# CACHE_LOCATION=127.0.0.1:11211.
+CACHE_BACKEND = os.environ.get(
+    'CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'
+)
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'api_yamdb_cache')
+        ),
+    }
+}
+if CACHE_BACKEND.endswith('.FileBasedCache'):
+    # Файловый кэш перебирает папку при каждой записи.
+    CACHES['default']['OPTIONS'] = {'MAX_ENTRIES': 10000}
+
 
 # Password validation
 
@@ -116,7 +175,7 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.LimitOffsetOrCursorPagination',
     'PAGE_SIZE': 10,
 }
 SIMPLE_JWT = {
@@ -131,6 +190,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_HOST_USER = 'yambd@gmail.com'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+# Письма отправляет из очереди в БД manage.py run_outbox, см. api/outbox.py.
+# Задержки - в секундах.
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_POLL_INTERVAL = 5
+OUTBOX_LEASE = 300
+OUTBOX_RETRY_DELAY = 30
+OUTBOX_MAX_RETRY_DELAY = 3600
+OUTBOX_MAX_ATTEMPTS = 10
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=10),
     'AUTH_HEADER_TYPES': ('Bearer',),
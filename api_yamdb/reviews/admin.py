@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Category, Genre, Title, Review, Comment, GenreTitle, User
+from .models import (Category, Genre, Title, Review, Comment, GenreTitle, User,
+                     ScoreDistribution, OutboxEmail)
 
 
 @admin.register(Category)
@@ -62,3 +63,20 @@ class UserAdmin(admin.ModelAdmin):
 @admin.register(GenreTitle)
 class GenreTitleAdmin(admin.ModelAdmin):
     list_display = ('pk', 'title_id', 'genre_id')
+
+
+@admin.register(ScoreDistribution)
+class ScoreDistributionAdmin(admin.ModelAdmin):
+    list_display = ('title',) + tuple(
+        ScoreDistribution.field_name(score)
+        for score in ScoreDistribution.SCORES
+    )
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'recipient', 'subject', 'created', 'send_after',
+                    'attempts', 'sent')
+    search_fields = ('recipient',)
+    list_filter = ('sent',)
+    empty_value_display = '-пусто-'
@@ -0,0 +1,275 @@
+import csv
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from reviews import search
+from reviews.management.commands.import_data import (
+    CHUNK_SIZE, DICT, chunked, write_rows
+)
+from reviews.management.commands.rebuild_ratings import (
+    rebuild_comment_counts, rebuild_ratings, rebuild_score_distributions
+)
+from reviews.models import (
+    Category, Comment, Genre, GenreTitle, Review, Title, User
+)
+from reviews.signals import data_rebuilt
+
+WORDS = (
+    'время', 'город', 'дорога', 'жизнь', 'звезда', 'зима', 'игра', 'история',
+    'космос', 'лето', 'любовь', 'мир', 'море', 'ночь', 'огонь', 'остров',
+    'песня', 'путь', 'река', 'свет', 'сердце', 'сила', 'слово', 'солнце',
+    'тайна', 'тень', 'утро', 'человек', 'ветер', 'война', 'дом', 'друг',
+    'книга', 'лес', 'небо', 'память', 'правда', 'сон', 'судьба', 'эхо',
+)
+ADJECTIVES = (
+    'белый', 'быстрый', 'вечный', 'глубокий', 'далёкий', 'дикий', 'добрый',
+    'живой', 'забытый', 'красный', 'последний', 'старый', 'тихий',
+    'холодный', 'чёрный', 'чужой', 'новый', 'ясный',
+)
+# Доли ролей пользователей: модераторов и администраторов немного.
+ROLES = ((User.USER, 0.97), (User.MODERATOR, 0.02), (User.ADMIN, 0.01))
+DATES_START = datetime(2015, 1, 1, tzinfo=timezone.utc)
+DATES_SPAN = timedelta(days=365 * 8)
+
+
+def zipf_counts(total, size, exponent, limit, rng):
+    """Разбиение total на size частей с долями по закону Ципфа.
+
+    Часть ранга r пропорциональна 1 / r ** exponent и не больше limit.
+    Части перемешиваются, чтобы популярность не совпадала с порядком id.
+    """
+
+    weights = [1 / rank ** exponent for rank in range(1, size + 1)]
+    scale = total / sum(weights)
+    counts = [min(int(weight * scale), limit) for weight in weights]
+    remainder = total - sum(counts)
+    while remainder > 0:
+        free = [rank for rank in range(size) if counts[rank] < limit]
+        for rank in free[:remainder]:
+            counts[rank] += 1
+        remainder -= min(len(free), remainder)
+    rng.shuffle(counts)
+    return counts
+
+
+class Generator:
+    """Связанные строки всех моделей по заданным количествам.
+
+    Строки - словари attname -> значение в формате clean_row. id
+    начинаются с start[model], чтобы не пересекаться с данными в БД.
+    """
+
+    def __init__(self, options, start, rng):
+        self.options = options
+        self.start = start
+        self.rng = rng
+        self.review_counts = zipf_counts(
+            options['reviews'], options['titles'], options['zipf'],
+            options['users'], rng
+        )
+        self.counts = {
+            User: options['users'],
+            Genre: options['genres'],
+            Category: options['categories'],
+            Title: options['titles'],
+            Review: sum(self.review_counts),
+            Comment: options['comments'] if sum(self.review_counts) else 0,
+            GenreTitle: None,
+        }
+
+    def ids(self, model):
+        return range(self.start[model], self.start[model] + self.counts[model])
+
+    def pick(self, model):
+        return self.start[model] + self.rng.randrange(self.counts[model])
+
+    def text(self, words):
+        return ' '.join(self.rng.choices(WORDS, k=words))
+
+    def date(self):
+        return DATES_START + self.rng.random() * DATES_SPAN
+
+    def rows(self, model):
+        return getattr(self, f'{model.__name__.lower()}_rows')()
+
+    def user_rows(self):
+        roles, weights = zip(*ROLES)
+        for pk in self.ids(User):
+            yield {
+                'id': pk,
+                'username': f'user{pk}',
+                'email': f'user{pk}@yamdb.fake',
+                'role': self.rng.choices(roles, weights)[0],
+                'bio': '',
+                'first_name': '',
+                'last_name': '',
+            }
+
+    def genre_rows(self):
+        for pk in self.ids(Genre):
+            yield {'id': pk, 'name': f'Жанр {pk}', 'slug': f'genre-{pk}'}
+
+    def category_rows(self):
+        for pk in self.ids(Category):
+            yield {
+                'id': pk, 'name': f'Категория {pk}', 'slug': f'category-{pk}'
+            }
+
+    def title_rows(self):
+        year = datetime.now().year
+        for pk in self.ids(Title):
+            yield {
+                'id': pk,
+                'name': (f'{self.rng.choice(ADJECTIVES)} '
+                         f'{self.text(self.rng.randint(1, 3))}').capitalize(),
+                'year': self.rng.randint(1900, year),
+                'description': self.text(self.rng.randint(5, 30)),
+                'category_id': self.pick(Category),
+            }
+
+    def genretitle_rows(self):
+        pk = self.start[GenreTitle]
+        genres = list(self.ids(Genre))
+        for title_id in self.ids(Title):
+            for genre_id in self.rng.sample(
+                genres, min(len(genres), self.rng.randint(1, 3))
+            ):
+                yield {'id': pk, 'title_id': title_id, 'genre_id': genre_id}
+                pk += 1
+
+    def review_rows(self):
+        pk = self.start[Review]
+        users = self.ids(User)
+        for title_id, count in zip(self.ids(Title), self.review_counts):
+            # Средняя оценка своя у каждого произведения.
+            quality = self.rng.gauss(7, 1.5)
+            for author_id in self.rng.sample(users, count):
+                yield {
+                    'id': pk,
+                    'title_id': title_id,
+                    'text': self.text(self.rng.randint(5, 60)),
+                    'author_id': author_id,
+                    'score': min(10, max(1, round(
+                        self.rng.gauss(quality, 1.5)
+                    ))),
+                    'pub_date': self.date(),
+                }
+                pk += 1
+
+    def comment_rows(self):
+        for pk in self.ids(Comment):
+            yield {
+                'id': pk,
+                'review_id': self.pick(Review),
+                'text': self.text(self.rng.randint(3, 30)),
+                'author_id': self.pick(User),
+                'pub_date': self.date(),
+            }
+
+
+def csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class Command(BaseCommand):
+    help = 'генерация тестовых данных в БД или в .csv'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument('--reviews', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='Показатель распределения Ципфа для числа отзывов на '
+                 'произведение: чем больше, тем сильнее перекос.'
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--output',
+            help='Папка для csv файлов в формате import_data. Без неё '
+                 'данные записываются прямо в БД.'
+        )
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def log(self, message):
+        if self.verbosity >= 1:
+            self.stdout.write(message)
+
+    def write_csv(self, generator, path):
+        os.makedirs(path, exist_ok=True)
+        for model, file_name in DICT.items():
+            started = time.monotonic()
+            count = 0
+            with open(os.path.join(path, file_name), 'w', newline='',
+                      encoding='utf8') as csv_file:
+                writer = None
+                for row in generator.rows(model):
+                    if writer is None:
+                        writer = csv.DictWriter(csv_file, fieldnames=row)
+                        writer.writeheader()
+                    writer.writerow(
+                        {key: csv_value(value) for key, value in row.items()}
+                    )
+                    count += 1
+            self.log_model(file_name, count, started)
+
+    def write_db(self, generator, chunk_size):
+        with transaction.atomic():
+            for model in DICT:
+                started = time.monotonic()
+                count = 0
+                for rows in chunked(generator.rows(model), chunk_size):
+                    write_rows(model, rows, chunk_size)
+                    count += len(rows)
+                self.log_model(model.__name__, count, started)
+            rebuild_ratings()
+            rebuild_score_distributions()
+            rebuild_comment_counts()
+            search.rebuild_index()
+        data_rebuilt.send(sender=self.__class__, models=tuple(DICT))
+
+    def log_model(self, name, count, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.log(
+            f'{name}: {count} строк за {elapsed:.2f} с, '
+            f'{count / elapsed:.0f} строк/с'
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        for name in ('users', 'categories', 'genres', 'titles'):
+            if options[name] < 1:
+                raise CommandError(f'--{name} должен быть положительным.')
+        for name in ('reviews', 'comments'):
+            if options[name] < 0:
+                raise CommandError(f'--{name} не может быть отрицательным.')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size должен быть положительным.')
+        options['reviews'] = min(
+            options['reviews'], options['users'] * options['titles']
+        )
+        rng = random.Random(options['seed'])
+        if options['output']:
+            start = dict.fromkeys(DICT, 1)
+        else:
+            start = {
+                model: (model.objects.aggregate(pk=Max('pk'))['pk'] or 0) + 1
+                for model in DICT
+            }
+        generator = Generator(options, start, rng)
+        if options['output']:
+            self.write_csv(generator, options['output'])
+        else:
+            self.write_db(generator, options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS('Генерация завершена'))
@@ -1,14 +1,29 @@
 import csv
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from itertools import islice
 
-from django.core.management.base import BaseCommand
+import django
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
+from reviews import search
+from reviews.management.commands.rebuild_ratings import (
+    rebuild_comment_counts, rebuild_ratings, rebuild_score_distributions
+)
 from reviews.models import (
     Category, Comment, Genre, Review, Title, User, GenreTitle
 )
+from reviews.signals import data_rebuilt
 
 
 CSV_PATH = 'static/data/'
-FOREIGN_KEY_FIELDS = ('category', 'author')
+CHUNK_SIZE = 1000
+PROGRESS_INTERVAL = 1.0
 DICT = {
     User: 'users.csv',
     Genre: 'genre.csv',
@@ -18,34 +33,390 @@ DICT = {
     Comment: 'comments.csv',
     GenreTitle: 'genre_title.csv'
 }
+# Порядок загрузки для --workers: таблицы одного этапа не ссылаются друг
+# на друга и загружаются одновременно.
+STAGES = (
+    (User, Genre, Category),
+    (Title,),
+    (GenreTitle, Review),
+    (Comment,),
+)
+# Поле строки с id произведения, рейтинг и поисковый индекс которого
+# зависят от строк модели.
+TITLE_ID_FIELDS = {Title: 'id', Review: 'title_id'}
+# Поле строки с id отзыва, счётчик комментариев которого зависит от строк.
+REVIEW_ID_FIELDS = {Comment: 'review_id'}
+
+ImportResult = namedtuple('ImportResult', 'rows written title_ids review_ids')
+
+
+def chunked(iterable, size):
+    """Элементы iterable списками не длиннее size."""
+
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def clean_row(model, row, number):
+    """Значения строки CSV, приведённые к типам полей модели.
 
+    Ключи - attname полей (`author` -> `author_id`). number - номер
+    записи в файле для сообщения об ошибке.
+    """
+
+    values = {}
+    for name, value in row.items():
+        if name is None:
+            raise CommandError(
+                f'{model.__name__}, запись {number}: лишние значения.'
+            )
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise CommandError(
+                f'{model.__name__}, запись {number}: неизвестный столбец '
+                f'{name}.'
+            )
+        field = (model_field.target_field if model_field.is_relation
+                 else model_field)
+        if value == '' and model_field.null:
+            value = None
+        else:
+            try:
+                value = field.to_python(value)
+            except ValidationError as error:
+                raise CommandError(
+                    f'{model.__name__}, запись {number}, поле {name}: '
+                    f'{" ".join(error.messages)}'
+                )
+        values[model_field.attname] = value
+    return values
+
+
+def parse_chunk(model, header, rows, first_number):
+    """Разбор и проверка пачки строк CSV, выполняется в рабочем процессе."""
+
+    values = []
+    for number, row in enumerate(rows, first_number):
+        if not row:
+            continue
+        if len(row) != len(header):
+            raise CommandError(
+                f'{model.__name__}, запись {number}: ожидается '
+                f'{len(header)} значений, получено {len(row)}.'
+            )
+        values.append(clean_row(model, dict(zip(header, row)), number))
+    return values
+
+
+@contextmanager
+def explicit_values(model, names):
+    """Отключает auto_now_add у полей, значения которых заданы в файле.
+
+    Иначе bulk_create заменит даты из файла текущим временем.
+    """
+
+    fields = [
+        field for field in model._meta.concrete_fields
+        if field.attname in names and getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def upsert_rows(model, rows, batch_size):
+    """Вставка новых строк и обновление изменившихся, сравнение по id.
+
+    Возвращает записанные строки и прежние значения обновлённых строк.
+    """
+
+    fields = [name for name in rows[0] if name != 'id']
+    existing = {
+        values['id']: values
+        for values in model.objects.filter(
+            pk__in=[row['id'] for row in rows]
+        ).values('id', *fields)
+    }
+    new = [row for row in rows if row['id'] not in existing]
+    changed = [
+        row for row in rows
+        if row['id'] in existing and row != existing[row['id']]
+    ]
+    model.objects.bulk_create(
+        [model(**row) for row in new], batch_size=batch_size
+    )
+    if changed:
+        changed_fields = {
+            name for row in changed for name in fields
+            if row[name] != existing[row['id']][name]
+        }
+        model.objects.bulk_update(
+            [model(**row) for row in changed],
+            [model._meta.get_field(name).name for name in changed_fields],
+            batch_size=batch_size
+        )
+    return new + changed, [existing[row['id']] for row in changed]
+
+
+def write_rows(model, rows, batch_size, upsert=False):
+    """Запись пачки строк, очищенных clean_row.
+
+    Без upsert строки только вставляются. Возвращает число записанных
+    строк и id произведений и отзывов, которых касаются записанные строки.
+    id собираются только с upsert: без него счётчики пересчитываются
+    целиком, а множества росли бы вместе с файлом.
+    """
+
+    if not rows:
+        return 0, set(), set()
+    with explicit_values(model, rows[0]):
+        if not upsert:
+            model.objects.bulk_create(
+                [model(**row) for row in rows], batch_size=batch_size
+            )
+            return len(rows), set(), set()
+        written, previous = upsert_rows(model, rows, batch_size)
+    affected = written + previous
+    title_field = TITLE_ID_FIELDS.get(model)
+    review_field = REVIEW_ID_FIELDS.get(model)
+    return (
+        len(written),
+        {row[title_field] for row in affected} if title_field else set(),
+        {row[review_field] for row in affected} if review_field else set(),
+    )
 
-def csv_import(csv_data, model):
-    """Импорт данных из CSV-файла в базу данных."""
 
-    objects = []
-    for row in csv_data:
-        for field in FOREIGN_KEY_FIELDS:
-            if field in row:
-                row[f'{field}_id'] = row[field]
-                del row[field]
-        objects.append(model(**row))
-    model.objects.bulk_create(objects)
+def csv_import(csv_data, model, chunk_size=CHUNK_SIZE, progress=None,
+               upsert=False):
+    """Импорт данных из CSV-файла в базу данных.
+
+    Строки читаются потоком и записываются пачками по chunk_size, так что
+    расход памяти не зависит от размера файла. progress вызывается после
+    каждой пачки с числом загруженных строк. С upsert существующие по id
+    строки обновляются, если изменились, вместо ошибки вставки.
+    """
+
+    count = written = 0
+    title_ids, review_ids = set(), set()
+    for chunk in chunked(csv_data, chunk_size):
+        chunk_written, chunk_title_ids, chunk_review_ids = write_rows(
+            model,
+            [
+                clean_row(model, row, number)
+                for number, row in enumerate(chunk, count + 1)
+            ],
+            chunk_size,
+            upsert
+        )
+        count += len(chunk)
+        written += chunk_written
+        title_ids |= chunk_title_ids
+        review_ids |= chunk_review_ids
+        if progress is not None:
+            progress(count)
+    return ImportResult(count, written, title_ids, review_ids)
+
+
+def parse_file(pool, model, path, chunk_size, lookahead):
+    """Разобранные рабочими процессами пачки файла по порядку.
+
+    Вперёд разбирается не больше lookahead пачек, чтобы память не росла,
+    если запись в БД отстаёт от разбора.
+    """
+
+    with open(path, newline='', encoding='utf8') as csv_file:
+        reader = csv.reader(csv_file)
+        header = next(reader, [])
+        pending = deque()
+        number = 1
+        for chunk in chunked(reader, chunk_size):
+            pending.append(
+                pool.submit(parse_chunk, model, header, chunk, number)
+            )
+            number += len(chunk)
+            if len(pending) > lookahead:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
 
 class Command(BaseCommand):
     help = 'импорт из .csv'
 
-    def handle(self, *args, **kwargs):
-        for model in DICT:
-            with open(
-                CSV_PATH + DICT[model],
-                newline='',
-                encoding='utf8'
-            ) as csv_file:
-                csv_import(csv.DictReader(csv_file), model)
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', default=CSV_PATH,
+            help='Папка с csv файлами.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=CHUNK_SIZE,
+            help='Число строк, читаемых и записываемых за раз.'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Число процессов, разбирающих csv файлы. При N > 1 '
+                 'независимые таблицы загружаются одновременно, по одной '
+                 'транзакции на этап.'
+        )
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help='Обновить существующие по id строки, если они изменились, '
+                 'и добавить новые. Рейтинги и поисковый индекс '
+                 'пересчитываются только для затронутых произведений.'
+        )
+        parser.add_argument(
+            '--single-transaction', action='store_true',
+            help='Загрузить все файлы в одной транзакции, а не по одной '
+                 'транзакции на файл.'
+        )
+
+    def log(self, message):
+        if self.verbosity >= 1:
+            self.stdout.write(message)
+
+    def progress_reporter(self, file_name):
+        started = last_report = time.monotonic()
+
+        def progress(count, written=None):
+            nonlocal last_report
+            now = time.monotonic()
+            elapsed = max(now - started, 1e-6)
+            if written is not None:
+                self.log(
+                    f'{file_name}: {count} строк, записано {written}, '
+                    f'за {elapsed:.2f} с, {count / elapsed:.0f} строк/с'
+                )
+            elif now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                self.log(
+                    f'  {file_name}: {count} строк, '
+                    f'{count / elapsed:.0f} строк/с'
+                )
+        return progress
+
+    def import_file(self, model, path, chunk_size, upsert):
+        progress = self.progress_reporter(os.path.basename(path))
+        with open(path, newline='', encoding='utf8') as csv_file:
+            with transaction.atomic():
+                result = csv_import(
+                    csv.DictReader(csv_file), model, chunk_size, progress,
+                    upsert
+                )
+        progress(result.rows, result.written)
+        return result
+
+    def import_stage(self, pool, models, path, chunk_size, lookahead,
+                     upsert):
+        """Загрузка таблиц этапа: пачки файлов пишутся по очереди."""
+
+        files = {}
+        for model in models:
+            file_path = os.path.join(path, DICT[model])
+            files[model] = (
+                parse_file(pool, model, file_path, chunk_size, lookahead),
+                self.progress_reporter(DICT[model]),
+            )
+        counts = dict.fromkeys(models, 0)
+        written = dict.fromkeys(models, 0)
+        title_ids, review_ids = set(), set()
+        with transaction.atomic():
+            while files:
+                for model, (chunks, progress) in list(files.items()):
+                    rows = next(chunks, None)
+                    if rows is None:
+                        progress(counts[model], written[model])
+                        del files[model]
+                        continue
+                    chunk_written, chunk_title_ids, chunk_review_ids = \
+                        write_rows(model, rows, chunk_size, upsert)
+                    counts[model] += len(rows)
+                    written[model] += chunk_written
+                    title_ids |= chunk_title_ids
+                    review_ids |= chunk_review_ids
+                    progress(counts[model])
+        return ImportResult(
+            sum(counts.values()), sum(written.values()), title_ids,
+            review_ids
+        )
+
+    def import_parallel(self, path, chunk_size, workers, upsert):
+        with ProcessPoolExecutor(workers, initializer=django.setup) as pool:
+            return [
+                self.import_stage(
+                    pool, models, path, chunk_size, workers * 2, upsert
+                )
+                for models in STAGES
+            ]
+
+    def rebuild_titles(self, title_ids):
+        """Пересчёт рейтингов и индекса только указанных произведений."""
+
+        for chunk in chunked(sorted(title_ids), CHUNK_SIZE):
+            rebuild_ratings(chunk)
+            rebuild_score_distributions(chunk)
+            search.index_titles(
+                Title.objects.filter(pk__in=chunk).only('name', 'description')
+            )
+
+    def rebuild_reviews(self, review_ids):
+        """Пересчёт счётчиков комментариев только указанных отзывов."""
+
+        for chunk in chunked(sorted(review_ids), CHUNK_SIZE):
+            rebuild_comment_counts(chunk)
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        chunk_size = options['chunk_size']
+        workers = options['workers']
+        if chunk_size < 1:
+            raise CommandError('--chunk-size должен быть положительным.')
+        if workers < 1:
+            raise CommandError('--workers должен быть положительным.')
+        started = time.monotonic()
+        run = (transaction.atomic() if options['single_transaction']
+               else nullcontext())
+        upsert = options['upsert']
+        with run:
+            if workers > 1:
+                results = self.import_parallel(
+                    options['path'], chunk_size, workers, upsert
+                )
+            else:
+                results = [
+                    self.import_file(
+                        model, os.path.join(options['path'], file_name),
+                        chunk_size, upsert
+                    )
+                    for model, file_name in DICT.items()
+                ]
+            with transaction.atomic():
+                if upsert:
+                    self.rebuild_titles(set().union(
+                        *(result.title_ids for result in results)
+                    ))
+                    self.rebuild_reviews(set().union(
+                        *(result.review_ids for result in results)
+                    ))
+                else:
+                    rebuild_ratings()
+                    rebuild_score_distributions()
+                    rebuild_comment_counts()
+                    search.rebuild_index()
+        data_rebuilt.send(sender=self.__class__, models=tuple(DICT))
         self.stdout.write(
             self.style.SUCCESS(
-                'Загрузка завершена'
+                f'Загрузка завершена: '
+                f'{sum(result.rows for result in results)} строк, записано '
+                f'{sum(result.written for result in results)}, за '
+                f'{time.monotonic() - started:.2f} с'
             )
         )
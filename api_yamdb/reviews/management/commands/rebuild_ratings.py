@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Avg, Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from reviews.models import Comment, Review, ScoreDistribution, Title
+from reviews.signals import data_rebuilt
+
+
+def get_titles(title_ids):
+    if title_ids is None:
+        return Title.objects.all()
+    return Title.objects.filter(pk__in=title_ids)
+
+
+def rebuild_ratings(title_ids=None):
+    """Пересчёт рейтинга и счётчиков произведений по таблице отзывов.
+
+    Без title_ids пересчитываются все произведения.
+    """
+
+    reviews = Review.objects.filter(title=OuterRef('pk')).order_by()\
+        .values('title')
+    return get_titles(title_ids).update(
+        review_count=Coalesce(
+            Subquery(reviews.annotate(value=Count('pk')).values('value')), 0
+        ),
+        score_sum=Coalesce(
+            Subquery(reviews.annotate(value=Sum('score')).values('value')), 0
+        ),
+        rating=Subquery(reviews.annotate(value=Avg('score')).values('value')),
+    )
+
+
+def rebuild_score_distributions(title_ids=None):
+    """Пересоздание гистограмм оценок произведений (без title_ids - всех)."""
+
+    titles = get_titles(title_ids)
+    distributions = {
+        title_id: ScoreDistribution(title_id=title_id)
+        for title_id in titles.values_list('pk', flat=True)
+    }
+    counts = Review.objects.filter(title__in=titles).order_by()\
+        .values('title', 'score').annotate(count=Count('pk'))
+    for row in counts:
+        setattr(
+            distributions[row['title']],
+            ScoreDistribution.field_name(row['score']),
+            row['count']
+        )
+    ScoreDistribution.objects.filter(title__in=titles).delete()
+    ScoreDistribution.objects.bulk_create(
+        distributions.values(), batch_size=500
+    )
+
+
+def rebuild_comment_counts(review_ids=None):
+    """Пересчёт счётчиков комментариев отзывов (без review_ids - всех)."""
+
+    reviews = Review.objects.all()
+    if review_ids is not None:
+        reviews = reviews.filter(pk__in=review_ids)
+    comments = Comment.objects.filter(review=OuterRef('pk')).order_by()\
+        .values('review')
+    return reviews.update(
+        comment_count=Coalesce(
+            Subquery(comments.annotate(value=Count('pk')).values('value')), 0
+        )
+    )
+
+
+class Command(BaseCommand):
+    help = 'пересчёт рейтингов произведений и счётчиков комментариев'
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            updated = rebuild_ratings()
+            rebuild_score_distributions()
+            rebuild_comment_counts()
+        data_rebuilt.send(sender=self.__class__, models=(Title, Review))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Рейтинг пересчитан для {updated} произведений'
+            )
+        )
@@ -0,0 +1,51 @@
+# Generated by Django 3.2 on 2026-10-18 19:27
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_distribution(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    ScoreDistribution = apps.get_model('reviews', 'ScoreDistribution')
+    distributions = {
+        title_id: ScoreDistribution(title_id=title_id)
+        for title_id in Title.objects.values_list('pk', flat=True)
+    }
+    counts = Review.objects.order_by().values('title', 'score')\
+        .annotate(count=Count('pk'))
+    for row in counts:
+        setattr(
+            distributions[row['title']], f'score_{row["score"]}', row['count']
+        )
+    ScoreDistribution.objects.bulk_create(
+        distributions.values(), batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0014_title_review_count_score_sum'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreDistribution',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score_distribution', serialize=False, to='reviews.title')),
+                ('score_1', models.PositiveIntegerField(default=0)),
+                ('score_2', models.PositiveIntegerField(default=0)),
+                ('score_3', models.PositiveIntegerField(default=0)),
+                ('score_4', models.PositiveIntegerField(default=0)),
+                ('score_5', models.PositiveIntegerField(default=0)),
+                ('score_6', models.PositiveIntegerField(default=0)),
+                ('score_7', models.PositiveIntegerField(default=0)),
+                ('score_8', models.PositiveIntegerField(default=0)),
+                ('score_9', models.PositiveIntegerField(default=0)),
+                ('score_10', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(fill_distribution, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+from reviews import search
+
+
+def create_index(apps, schema_editor):
+    if search.is_supported(schema_editor.connection):
+        search.create_index(schema_editor.connection)
+        search.rebuild_index(schema_editor.connection)
+
+
+def drop_index(apps, schema_editor):
+    if search.is_supported(schema_editor.connection):
+        search.drop_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0015_scoredistribution'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -1,7 +1,8 @@
 from django.contrib.auth.validators import UnicodeUsernameValidator
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 
 from . validators import validate_year, validate_me
 
@@ -9,6 +10,25 @@ from . validators import validate_year, validate_me
 UsernameValidator = UnicodeUsernameValidator()
 
 
+class CounterFieldsMixin:
+    """save() существующего объекта не перезаписывает счётчики.
+
+    `counter_fields` меняются только F()-выражениями в reviews.signals,
+    а значения в памяти могут быть устаревшими.
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
+
+
 class User(AbstractUser):
     """Кастом класс пользователя."""
 
@@ -47,6 +67,20 @@ class User(AbstractUser):
         default=11111
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Имя пользователя входит в отзывы и комментарии, его изменение
+        # меняет их версии, см. api/versions.py.
+        self._loaded_values = {
+            **getattr(self, '_loaded_values', {}), 'username': self.username
+        }
+
     @property
     def is_admin(self):
         return self.role == self.ADMIN
@@ -83,12 +117,22 @@ class Genre(models.Model):
         return f'{self.name}'
 
 
-class Title(models.Model):
+class Title(CounterFieldsMixin, models.Model):
     """Наименование и атрибуты произведений."""
 
+    counter_fields = ('rating', 'review_count', 'score_sum')
+
     name = models.CharField(max_length=256, blank=False)
     year = models.IntegerField(validators=[validate_year])
     rating = models.FloatField(null=True)
+    review_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество отзывов'
+    )
+    score_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Сумма оценок'
+    )
     description = models.TextField(max_length=300, blank=True)
     genre = models.ManyToManyField(
         Genre,
@@ -106,15 +150,53 @@ class Title(models.Model):
         return f'{self.name}'
 
 
+class ScoreDistribution(models.Model):
+    """Гистограмма оценок произведения: число отзывов на каждую оценку."""
+
+    SCORES = range(1, 11)
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score_distribution'
+    )
+    score_1 = models.PositiveIntegerField(default=0)
+    score_2 = models.PositiveIntegerField(default=0)
+    score_3 = models.PositiveIntegerField(default=0)
+    score_4 = models.PositiveIntegerField(default=0)
+    score_5 = models.PositiveIntegerField(default=0)
+    score_6 = models.PositiveIntegerField(default=0)
+    score_7 = models.PositiveIntegerField(default=0)
+    score_8 = models.PositiveIntegerField(default=0)
+    score_9 = models.PositiveIntegerField(default=0)
+    score_10 = models.PositiveIntegerField(default=0)
+
+    @staticmethod
+    def field_name(score):
+        return f'score_{score}'
+
+    def as_dict(self):
+        return {
+            str(score): getattr(self, self.field_name(score))
+            for score in self.SCORES
+        }
+
+    def __str__(self) -> str:
+        return f'{self.title_id}'
+
+
 class GenreTitle(models.Model):
     """Связывающая модель для ManyToMany."""
     title = models.ForeignKey(Title, on_delete=models.CASCADE)
     genre = models.ForeignKey(Genre, on_delete=models.CASCADE)
 
 
-class Review(models.Model):
+class Review(CounterFieldsMixin, models.Model):
     """Отзывы пользователей на Title."""
 
+    counter_fields = ('comment_count',)
+
     title = models.ForeignKey(
         Title,
         on_delete=models.CASCADE,
@@ -131,6 +213,25 @@ class Review(models.Model):
         validators=[MinValueValidator(1), MaxValueValidator(10)]
     )
     pub_date = models.DateTimeField(auto_now_add=True, db_index=True)
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество комментариев'
+    )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Счётчики произведения обновляются в post_save внутри этой же
+        # транзакции, см. reviews.signals.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self._loaded_values = {
+                'title_id': self.title_id, 'score': self.score
+            }
 
     def __str__(self):
         return self.text
@@ -164,3 +265,39 @@ class Comment(models.Model):
 
     def __str__(self) -> str:
         return self.text
+
+
+class OutboxEmail(models.Model):
+    """Письмо в очереди отправки, см. api/outbox.py."""
+
+    recipient = models.EmailField(verbose_name='Получатель')
+    from_email = models.EmailField(verbose_name='Отправитель')
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    body = models.TextField(verbose_name='Текст')
+    created = models.DateTimeField(auto_now_add=True)
+    send_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Отправить не раньше'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток отправки'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Ошибка')
+    sent = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Отправлено'
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['send_after'],
+                name='outbox_pending',
+                condition=models.Q(sent__isnull=True)
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.subject} -> {self.recipient}'
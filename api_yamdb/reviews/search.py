@@ -0,0 +1,121 @@
+"""Полнотекстовый индекс произведений на SQLite FTS5.
+
+Индекс хранится в виртуальной таблице `reviews_title_fts`, rowid строки
+совпадает с id произведения. На других СУБД индекс не создаётся, а поиск
+сводится к `icontains` по названию и описанию.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'reviews_title_fts'
+TOKEN_RE = re.compile(r'\w+')
+
+
+def is_supported(conn=connection):
+    return conn.vendor == 'sqlite'
+
+
+def create_index(conn=connection):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+            "name, description, tokenize='unicode61 remove_diacritics 2')"
+        )
+
+
+def drop_index(conn=connection):
+    with conn.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def index_exists(conn=connection):
+    return (is_supported(conn)
+            and FTS_TABLE in conn.introspection.table_names())
+
+
+def rebuild_index(conn=connection):
+    """Полное перестроение индекса по таблице произведений."""
+
+    if not index_exists(conn):
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            'SELECT id, name, description FROM reviews_title'
+        )
+
+
+def index_title(title):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', (title.pk,)
+        )
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)',
+            (title.pk, title.name, title.description)
+        )
+
+
+def index_titles(titles):
+    """Переиндексация нескольких произведений пачкой запросов."""
+
+    if not is_supported() or not titles:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+            [(title.pk,) for title in titles]
+        )
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, name, description) '
+            'VALUES (%s, %s, %s)',
+            [(title.pk, title.name, title.description) for title in titles]
+        )
+
+
+def remove_title(title_id):
+    if not is_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', (title_id,)
+        )
+
+
+def build_match_query(text):
+    """Поисковая строка в запрос FTS5: все слова, каждое как префикс."""
+
+    return ' '.join(f'"{token}"*' for token in TOKEN_RE.findall(text))
+
+
+def search_titles(queryset, text):
+    """Фильтрация произведений по запросу с аннотацией `search_rank`.
+
+    Меньшее значение `search_rank` соответствует лучшему совпадению.
+    Таблица индекса присоединяется к запросу, так что MATCH выполняется
+    один раз на запрос, а не для каждой строки.
+    """
+
+    match = build_match_query(text)
+    if not match:
+        return queryset.none().annotate(search_rank=RawSQL('0', ()))
+    if not is_supported():
+        return queryset.filter(
+            Q(name__icontains=text) | Q(description__icontains=text)
+        ).annotate(search_rank=RawSQL('0', ()))
+    table = queryset.model._meta.db_table
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[
+            f'{FTS_TABLE}.rowid = "{table}"."id"',
+            f'{FTS_TABLE} MATCH %s',
+        ],
+        params=[match],
+    ).annotate(search_rank=RawSQL(f'{FTS_TABLE}.rank', ()))
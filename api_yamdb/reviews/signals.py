@@ -0,0 +1,119 @@
+from django.db.models import Case, F, FloatField, When
+from django.db.models.functions import Cast
+from django.db import connections
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from . import search
+from .models import Comment, Review, ScoreDistribution, Title
+
+# Отправляется командами после записи в модели `models` через
+# update() / bulk_create(), минуя сигналы post_save и post_delete.
+data_rebuilt = Signal()
+
+
+def update_title_rating(title_id, count_delta, score_delta):
+    """Сдвиг счётчиков произведения и пересчёт рейтинга одним UPDATE."""
+
+    count = F('review_count') + count_delta
+    score = F('score_sum') + score_delta
+    Title.objects.filter(pk=title_id).update(
+        review_count=count,
+        score_sum=score,
+        rating=Case(
+            When(
+                review_count__gt=-count_delta,
+                then=Cast(score, FloatField()) / count
+            ),
+            default=None,
+            output_field=FloatField()
+        )
+    )
+
+
+def update_score_distribution(title_id, deltas):
+    """Сдвиг счётчиков гистограммы оценок, deltas: {оценка: изменение}."""
+
+    deltas = {score: delta for score, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    updated = ScoreDistribution.objects.filter(title_id=title_id).update(**{
+        ScoreDistribution.field_name(score): F(
+            ScoreDistribution.field_name(score)
+        ) + delta
+        for score, delta in deltas.items()
+    })
+    if not updated and any(delta > 0 for delta in deltas.values()):
+        ScoreDistribution.objects.create(title_id=title_id, **{
+            ScoreDistribution.field_name(score): max(delta, 0)
+            for score, delta in deltas.items()
+        })
+
+
+@receiver(post_save, sender=Title)
+def title_saved(sender, instance, created, raw, update_fields, **kwargs):
+    if raw:
+        return
+    if created:
+        ScoreDistribution.objects.create(title=instance)
+    if update_fields is None or {'name', 'description'} & set(update_fields):
+        search.index_title(instance)
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, **kwargs):
+    search.remove_title(instance.pk)
+
+
+def rebuild_search_index(sender, using, **kwargs):
+    """После миграций индекс пересобирается: SQLite мог пересоздать таблицу."""
+
+    search.rebuild_index(connections[using])
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        update_title_rating(instance.title_id, 1, instance.score)
+        update_score_distribution(instance.title_id, {instance.score: 1})
+        return
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is None:
+        return
+    old_title_id = loaded.get('title_id', instance.title_id)
+    old_score = loaded.get('score', instance.score)
+    if old_title_id != instance.title_id:
+        update_title_rating(old_title_id, -1, -old_score)
+        update_score_distribution(old_title_id, {old_score: -1})
+        update_title_rating(instance.title_id, 1, instance.score)
+        update_score_distribution(instance.title_id, {instance.score: 1})
+    elif old_score != instance.score:
+        update_title_rating(instance.title_id, 0, instance.score - old_score)
+        update_score_distribution(
+            instance.title_id, {old_score: -1, instance.score: 1}
+        )
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    update_title_rating(instance.title_id, -1, -instance.score)
+    update_score_distribution(instance.title_id, {instance.score: -1})
+
+
+def update_comment_count(review_id, delta):
+    Review.objects.filter(pk=review_id).update(
+        comment_count=F('comment_count') + delta
+    )
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        update_comment_count(instance.review_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    update_comment_count(instance.review_id, -1)
@@ -0,0 +1,328 @@
+"""Задержка и запросы к БД публичных эндпоинтов API.
+
+Запуск из корня репозитория:
+
+    python benchmarks/endpoints.py --sizes small,medium --output head.json
+    python benchmarks/endpoints.py --compare base.json head.json
+
+Для каждого размера скрипт создаёт временную тестовую БД, наполняет её
+командой generate_data и выполняет каждый эндпоинт из api/urls.py
+`--requests` раз. Для каждого эндпоинта записываются p50/p95/среднее
+время ответа, число SQL-запросов и их суммарное время. Результаты
+сохраняются в JSON, `--compare` сравнивает два таких файла, например
+из разных веток.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from io import StringIO
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+
+from reviews.models import Comment, Review, Title, User  # noqa: E402
+
+# Проверки и метрики разработки добавляют работу к каждому запросу и
+# искажают замеры, поэтому выключаются независимо от окружения.
+INSTRUMENTATION = {
+    'ENFORCE_QUERY_BUDGETS': False,
+    'SQL_FINGERPRINTS': False,
+    'SQL_FINGERPRINTS_SAMPLE_RATE': 0.0,
+    'METRICS_DIR': '',
+    'SERVER_TIMING': False,
+}
+
+SIZES = {
+    'small': {
+        'users': 100, 'titles': 1000, 'reviews': 10000, 'comments': 5000,
+    },
+    'medium': {
+        'users': 1000, 'titles': 10000, 'reviews': 100000,
+        'comments': 50000,
+    },
+    'large': {
+        'users': 20000, 'titles': 100000, 'reviews': 1000000,
+        'comments': 200000,
+    },
+}
+
+
+def endpoints(data):
+    """Эндпоинты: имя -> (клиент, метод, функция пути и тела запроса).
+
+    Отзывы и комментарии берутся у самого популярного произведения и
+    самого обсуждаемого отзыва - это худший случай для вложенных списков.
+    """
+
+    title = data['title']
+    review = data['review']
+    comment = data['comment']
+    genre = data['genre']
+    reviews = f'/api/v1/titles/{title}/reviews/'
+    comments = f'{reviews}{review}/comments/'
+    signups = itertools.count()
+
+    def get(path):
+        return lambda: (path, None)
+
+    def signup():
+        number = next(signups)
+        return '/api/v1/auth/signup/', {
+            'username': f'benchmark{number}',
+            'email': f'benchmark{number}@yamdb.fake',
+        }
+
+    return {
+        'categories.list': ('anon', 'get', get('/api/v1/categories/')),
+        'categories.search': (
+            'anon', 'get', get('/api/v1/categories/?search=1')
+        ),
+        'genres.list': ('anon', 'get', get('/api/v1/genres/')),
+        'titles.list': ('anon', 'get', get('/api/v1/titles/')),
+        'titles.list.offset': (
+            'anon', 'get', get('/api/v1/titles/?limit=100&offset=5000')
+        ),
+        'titles.list.cursor': (
+            'anon', 'get', get('/api/v1/titles/?pagination=cursor')
+        ),
+        'titles.filter.genre': (
+            'anon', 'get', get(f'/api/v1/titles/?genre__slug={genre}')
+        ),
+        'titles.filter.year': (
+            'anon', 'get', get('/api/v1/titles/?year=2000')
+        ),
+        'titles.ordering': (
+            'anon', 'get', get('/api/v1/titles/?ordering=-year')
+        ),
+        'titles.search': ('anon', 'get', get('/api/v1/titles/?q=звезда')),
+        'titles.fields': (
+            'anon', 'get', get('/api/v1/titles/?fields=id,name,rating')
+        ),
+        'titles.detail': ('anon', 'get', get(f'/api/v1/titles/{title}/')),
+        'titles.detail.expand': (
+            'anon', 'get',
+            get(f'/api/v1/titles/{title}/?expand=reviews.comments')
+        ),
+        'titles.stats': ('anon', 'get', get(f'/api/v1/titles/{title}/stats/')),
+        'reviews.list': ('anon', 'get', get(reviews)),
+        'reviews.list.cursor': (
+            'anon', 'get', get(f'{reviews}?pagination=cursor')
+        ),
+        'reviews.detail': ('anon', 'get', get(f'{reviews}{review}/')),
+        'comments.list': ('anon', 'get', get(comments)),
+        'comments.detail': ('anon', 'get', get(f'{comments}{comment}/')),
+        'suggest': ('anon', 'get', get('/api/v1/suggest/?prefix=зв')),
+        'users.list': ('admin', 'get', get('/api/v1/users/')),
+        'users.detail': (
+            'admin', 'get', get(f'/api/v1/users/{data["user"]}/')
+        ),
+        'users.me': ('admin', 'get', get('/api/v1/users/me/')),
+        'auth.signup': ('anon', 'post', signup),
+        'auth.token': ('anon', 'post', lambda: ('/api/v1/auth/token/', {
+            'username': data['user'], 'confirmation_code': 11111,
+        })),
+    }
+
+
+def prepare(counts, seed):
+    call_command('generate_data', seed=seed, stdout=StringIO(), **counts)
+    title = Title.objects.order_by('-review_count', 'pk').first()
+    review = Review.objects.filter(title=title)\
+        .order_by('-comment_count', 'pk').first()
+    admin = User.objects.create(
+        username='benchmark-admin', email='benchmark-admin@yamdb.fake',
+        role=User.ADMIN
+    )
+    return {
+        'title': title.pk,
+        'review': review.pk,
+        'comment': Comment.objects.create(
+            review=review, author=admin, text='Комментарий'
+        ).pk,
+        'genre': title.genre.first().slug,
+        'user': User.objects.exclude(pk=admin.pk).first().username,
+        'admin': admin,
+    }
+
+
+class QueryTimer:
+    """Число и суммарное время SQL-запросов, см. execute_wrapper."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def measure(client, method, request, repeat, warmup, cold):
+    timings, queries, query_times, statuses = [], [], [], set()
+    for attempt in range(warmup + repeat):
+        path, body = request()
+        if cold:
+            cache.clear()
+        timer = QueryTimer()
+        with connection.execute_wrapper(timer):
+            start = time.perf_counter()
+            response = getattr(client, method)(path, body, format='json')
+            elapsed = time.perf_counter() - start
+        if attempt < warmup:
+            continue
+        statuses.add(response.status_code)
+        timings.append(elapsed * 1000)
+        queries.append(timer.count)
+        query_times.append(timer.seconds * 1000)
+    return {
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+        'queries': max(queries),
+        'query_ms': round(statistics.median(query_times), 3),
+        'status': sorted(statuses),
+    }
+
+
+def run_size(name, counts, args):
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        cache.clear()
+        data = prepare(counts, args.seed)
+        clients = {'anon': APIClient(), 'admin': APIClient()}
+        clients['admin'].credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(data["admin"])}'
+        )
+        results = {}
+        for endpoint, (client, method, request) in endpoints(data).items():
+            if args.only and not any(
+                endpoint.startswith(prefix) for prefix in args.only
+            ):
+                continue
+            results[endpoint] = measure(
+                clients[client], method, request, args.requests,
+                args.warmup, args.cold
+            )
+            print_row(name, endpoint, results[endpoint])
+        return {'counts': counts, 'endpoints': results}
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def print_row(size, endpoint, result):
+    print(
+        f'{size:<7} {endpoint:<22} p50 {result["p50_ms"]:8.2f} мс  '
+        f'p95 {result["p95_ms"]:8.2f} мс  запросов {result["queries"]:3}  '
+        f'SQL {result["query_ms"]:7.2f} мс  '
+        f'{",".join(map(str, result["status"]))}'
+    )
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ('git', 'describe', '--always', '--dirty'), cwd=BASE_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(base_path, head_path):
+    with open(base_path, encoding='utf8') as file:
+        base = json.load(file)
+    with open(head_path, encoding='utf8') as file:
+        head = json.load(file)
+    print(f'{base["label"]} -> {head["label"]}')
+    for size, head_size in head['sizes'].items():
+        base_size = base['sizes'].get(size, {'endpoints': {}})
+        for endpoint, new in head_size['endpoints'].items():
+            old = base_size['endpoints'].get(endpoint)
+            if old is None:
+                continue
+            print(
+                f'{size:<7} {endpoint:<22} '
+                f'p50 {old["p50_ms"]:8.2f} -> {new["p50_ms"]:8.2f} мс '
+                f'({new["p50_ms"] / max(old["p50_ms"], 1e-6):5.2f}x)  '
+                f'запросов {old["queries"]:3} -> {new["queries"]:3}'
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--sizes', default='small,medium',
+        help=f'Размеры данных через запятую: {", ".join(SIZES)}.'
+    )
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument(
+        '--cold', action='store_true',
+        help='Очищать кэш перед каждым запросом.'
+    )
+    parser.add_argument(
+        '--only', type=lambda value: value.split(','), default=None,
+        help='Префиксы имён эндпоинтов через запятую, например titles.'
+    )
+    parser.add_argument('--label', default=None)
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'HEAD'))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    sizes = args.sizes.split(',')
+    unknown = set(sizes) - set(SIZES)
+    if unknown:
+        parser.error(f'неизвестные размеры: {", ".join(sorted(unknown))}')
+
+    setup_test_environment()
+    for name, value in INSTRUMENTATION.items():
+        setattr(settings, name, value)
+    results = {
+        'label': args.label or git_revision(),
+        'python': platform.python_version(),
+        'database': connection.vendor,
+        'requests': args.requests,
+        'cold': args.cold,
+        'sizes': {
+            size: run_size(size, SIZES[size], args) for size in sizes
+        },
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf8') as file:
+            json.dump(results, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Сравнение скорости сериализации списка произведений.
+
+Запуск из корня репозитория:
+
+    python benchmarks/title_serializers.py --titles 10000
+
+Скрипт создаёт временную тестовую БД, наполняет её произведениями с
+жанрами и категориями и сравнивает TitleSerializer с
+FastTitleListSerializer.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(BASE_DIR, 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+
+from api.fast_serializers import FastTitleListSerializer  # noqa: E402
+from api.serializers import TitleSerializer  # noqa: E402
+from reviews.models import Category, Genre, GenreTitle, Title  # noqa: E402
+
+
+def fill(titles):
+    random.seed(1)
+    Category.objects.bulk_create(
+        Category(name=f'Категория {i}', slug=f'category-{i}')
+        for i in range(10)
+    )
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(30)
+    )
+    categories = list(Category.objects.all())
+    genres = list(Genre.objects.all())
+    Title.objects.bulk_create(
+        (
+            Title(
+                name=f'Произведение {i}',
+                year=random.randint(1900, 2020),
+                rating=random.choice((None, random.uniform(1, 10))),
+                description='Описание ' * 10,
+                category=random.choice(categories),
+            )
+            for i in range(titles)
+        ),
+        batch_size=1000
+    )
+    GenreTitle.objects.bulk_create(
+        (
+            GenreTitle(title_id=title_id, genre=genre)
+            for title_id in Title.objects.values_list('pk', flat=True)
+            for genre in random.sample(genres, 3)
+        ),
+        batch_size=1000
+    )
+
+
+def measure(name, serialize, repeat, count):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        serialize()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(f'{name:<34} {best * 1000:9.1f} мс  {count / best:12.0f} шт/с')
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--titles', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        fill(args.titles)
+        queryset = Title.objects.select_related('category').order_by('pk')
+        fast = FastTitleListSerializer()
+
+        def regular():
+            return TitleSerializer(queryset.all(), many=True).data
+
+        def fast_path():
+            return fast.to_representation(fast.get_queryset(queryset.all()))
+
+        assert fast_path() == regular()
+
+        base = measure('TitleSerializer', regular, args.repeat, args.titles)
+        best = measure('FastTitleListSerializer', fast_path, args.repeat,
+                       args.titles)
+        print(f'Ускорение FastTitleListSerializer: {base / best:.1f}x')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Title
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    def get_title(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.OK
+        return response.json()
+
+    def test_01_rating_follows_review_writes(self, client, admin_client,
+                                             user_client, moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+
+        assert self.get_title(client, title_id).get('rating') is None, (
+            'Проверьте, что рейтинг произведения без отзывов равен `None`.'
+        )
+        review = create_single_review(user_client, title_id, 'text', 3)
+        create_single_review(moderator_client, title_id, 'text', 8)
+        assert self.get_title(client, title_id).get('rating') == 5, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'создании отзыва.'
+        )
+
+        response = user_client.patch(
+            f'{url}{review.json()["id"]}/', data={'score': 10}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_title(client, title_id).get('rating') == 9, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'изменении оценки в отзыве.'
+        )
+
+        response = user_client.delete(f'{url}{review.json()["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_title(client, title_id).get('rating') == 8, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'удалении отзыва.'
+        )
+
+    def test_02_rebuild_ratings(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'text', 7)
+        Title.objects.update(rating=None, review_count=0, score_sum=0)
+
+        call_command('rebuild_ratings')
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating, title.review_count, title.score_sum) == (
+            7, 1, 7
+        ), (
+            'Проверьте, что команда `rebuild_ratings` восстанавливает '
+            'рейтинг и счётчики произведений по таблице отзывов.'
+        )
+        assert Title.objects.get(pk=titles[1]['id']).rating is None
+
+    def test_03_score_distribution(self, client, admin_client, user_client,
+                                   moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review = create_single_review(user_client, title_id, 'text', 3)
+        create_single_review(moderator_client, title_id, 'text', 8)
+        user_client.patch(
+            f'/api/v1/titles/{title_id}/reviews/{review.json()["id"]}/',
+            data={'score': 8}
+        )
+        expected = {str(score): 0 for score in range(1, 11)}
+        expected['8'] = 2
+
+        assert 'score_distribution' not in self.get_title(client, title_id), (
+            'Поле `score_distribution` должно выводиться только по запросу.'
+        )
+        response = client.get(
+            f'/api/v1/titles/{title_id}/?score_distribution=1'
+        )
+        assert response.json().get('score_distribution') == expected, (
+            'Проверьте, что поле `score_distribution` содержит число '
+            'отзывов на каждую оценку.'
+        )
+
+        response = client.get(f'/api/v1/titles/{title_id}/stats/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {
+            'title': title_id, 'score_distribution': expected
+        }, (
+            'Проверьте, что эндпоинт `/api/v1/titles/{title_id}/stats/` '
+            'возвращает гистограмму оценок произведения.'
+        )
+        response = client.get(f'/api/v1/titles/{titles[1]["id"]}/stats/')
+        assert set(response.json()['score_distribution'].values()) == {0}
+
+        response = client.get('/api/v1/titles/0/stats/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        response = client.get('/api/v1/titles/abc/stats/')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что `/api/v1/titles/{title_id}/stats/` с '
+            'нечисловым id возвращает ответ со статусом 404.'
+        )
@@ -0,0 +1,83 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_reviews, create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09CursorPagination:
+
+    def collect_pages(self, client, url):
+        results = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что GET-запрос к `{url}` в курсорном режиме '
+                'возвращает ответ со статусом 200.'
+            )
+            data = response.json()
+            assert 'count' not in data, (
+                'Проверьте, что в курсорном режиме пагинации ответ не '
+                'содержит ключ `count`.'
+            )
+            results.extend(data['results'])
+            url = data['next']
+        return results
+
+    def test_01_titles_cursor(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        results = self.collect_pages(
+            client, '/api/v1/titles/?pagination=cursor&limit=1'
+        )
+        assert [title['id'] for title in results] == sorted(
+            title['id'] for title in titles
+        ), (
+            'Проверьте, что в курсорном режиме `/api/v1/titles/` '
+            'возвращает все произведения в порядке `id`.'
+        )
+
+        response = client.get('/api/v1/titles/')
+        assert response.json().get('count') == len(titles), (
+            'Проверьте, что по умолчанию для `/api/v1/titles/` сохраняется '
+            'пагинация limit/offset.'
+        )
+
+    def test_01_01_nullable_ordering(self, client, admin_client,
+                                     user_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[1]['id'], 'text', 7)
+        for ordering in ('rating', '-rating'):
+            results = self.collect_pages(
+                client,
+                f'/api/v1/titles/?pagination=cursor&ordering={ordering}'
+                '&limit=1'
+            )
+            assert sorted(title['id'] for title in results) == sorted(
+                title['id'] for title in titles
+            ), (
+                'Проверьте, что курсорный режим `/api/v1/titles/` с '
+                'сортировкой по полю, допускающему NULL, возвращает все '
+                'произведения, в том числе без отзывов.'
+            )
+
+    def test_02_reviews_cursor(self, client, admin_client, admin, user,
+                               user_client, moderator, moderator_client):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               '?pagination=cursor&limit=2')
+        response = client.get(url)
+        assert len(response.json()['results']) == 2
+
+        results = self.collect_pages(client, url)
+        assert [review['id'] for review in results] == [
+            review['id'] for review in reversed(reviews)
+        ], (
+            'Проверьте, что в курсорном режиме отзывы возвращаются '
+            'от новых к старым без пропусков и повторов.'
+        )
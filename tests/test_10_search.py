@@ -0,0 +1,106 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews import search
+from reviews.models import Title
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10TitleSearch:
+
+    def search(self, client, query):
+        response = client.get('/api/v1/titles/', {'q': query})
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что GET-запрос к `/api/v1/titles/?q=` возвращает '
+            'ответ со статусом 200.'
+        )
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_search(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        assert self.search(client, 'термин') == [titles[0]['name']], (
+            'Проверьте, что поиск `?q=` находит произведения по началу '
+            'слова в названии.'
+        )
+        assert self.search(client, 'yippie') == [titles[1]['name']], (
+            'Проверьте, что поиск `?q=` находит произведения по описанию.'
+        )
+        assert self.search(client, 'nothing') == []
+
+    def test_02_search_follows_writes(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        admin_client.patch(url, data={'name': 'Хищник'})
+        assert self.search(client, 'термин') == []
+        assert self.search(client, 'хищник') == ['Хищник'], (
+            'Проверьте, что поисковый индекс обновляется при изменении '
+            'произведения.'
+        )
+        admin_client.delete(url)
+        assert self.search(client, 'хищник') == [], (
+            'Проверьте, что поисковый индекс обновляется при удалении '
+            'произведения.'
+        )
+
+    def test_03_search_ranking(self, client, admin_client):
+        create_titles(admin_client)
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Back to the Future',
+            'year': 1985,
+            'genre': ['comedy'],
+            'category': 'films',
+            'description': 'Back in time, back again, back to 1955.'
+        })
+        assert self.search(client, 'back') == [
+            'Back to the Future', 'Терминатор'
+        ], (
+            'Проверьте, что результаты поиска `?q=` отсортированы по '
+            'релевантности.'
+        )
+
+    def test_04_search_plan(self, client):
+        Title.objects.bulk_create(
+            Title(name=f'Звезда {number}', year=2000, description='звёзды')
+            for number in range(300)
+        )
+        search.rebuild_index()
+        cache.clear()
+        with CaptureQueriesContext(connection) as plain:
+            client.get('/api/v1/titles/')
+        for query in ('звезда', 'з'):
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                response = client.get('/api/v1/titles/', {'q': query})
+            assert response.json()['count'] == 300
+            assert len(context.captured_queries) == len(
+                plain.captured_queries
+            ), (
+                'Проверьте, что поиск `?q=` не добавляет запросов к списку '
+                'произведений.'
+            )
+            for captured in context.captured_queries:
+                sql = captured['sql']
+                assert sql.count('MATCH') <= 1, (
+                    'Проверьте, что поиск `?q=` выполняет MATCH один раз '
+                    'на запрос.'
+                )
+                with connection.cursor() as cursor:
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                    plan = ' '.join(row[-1] for row in cursor.fetchall())
+                assert 'CORRELATED' not in plan, (
+                    'Проверьте, что ранг поиска `?q=` не вычисляется '
+                    'подзапросом для каждой строки.'
+                )
+
+    def test_05_punctuation(self, client, admin_client):
+        create_titles(admin_client)
+        for query in ('"', '*', '!?'):
+            assert self.search(client, query) == [], (
+                'Проверьте, что поиск `?q=` без слов возвращает пустой '
+                'список.'
+            )
@@ -0,0 +1,68 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.suggest import suggest_index
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11Suggest:
+
+    url = '/api/v1/suggest/'
+
+    def test_01_suggest(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        response = client.get(self.url, {'prefix': 'ко'})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{self.url}` возвращает ответ со '
+            'статусом 200.'
+        )
+        assert response.json() == {
+            'titles': [],
+            'genres': [genres[1]],
+            'categories': [],
+        }, (
+            f'Проверьте, что `{self.url}?prefix=` возвращает жанры, '
+            'категории и произведения, название которых начинается '
+            'с префикса.'
+        )
+
+        data = client.get(self.url, {'prefix': 'ОРЕШ'}).json()
+        assert data['titles'] == [
+            {'id': titles[1]['id'], 'name': titles[1]['name']}
+        ], (
+            f'Проверьте, что `{self.url}?prefix=` ищет без учёта регистра '
+            'по началу любого слова в названии.'
+        )
+
+    def test_02_suggest_follows_writes(self, client, admin_client):
+        create_titles(admin_client)
+        client.get(self.url, {'prefix': 'ф'})
+        with CaptureQueriesContext(connection) as context:
+            data = client.get(self.url, {'prefix': 'ф'}).json()
+        assert len(context.captured_queries) == 0, (
+            f'Проверьте, что `{self.url}` отвечает из индекса в памяти без '
+            'запросов к базе данных.'
+        )
+        assert data['categories'] == [{'name': 'Фильм', 'slug': 'films'}]
+
+        titles = suggest_index.indexes['titles']
+        admin_client.post(
+            '/api/v1/categories/', data={'name': 'Фото', 'slug': 'photo'}
+        )
+        with CaptureQueriesContext(connection) as context:
+            data = client.get(self.url, {'prefix': 'ф', 'limit': 1}).json()
+        assert len(context.captured_queries) == 1, (
+            f'Проверьте, что при изменении категорий `{self.url}` '
+            'перестраивает только список категорий.'
+        )
+        assert suggest_index.indexes['titles'] is titles
+        assert data['categories'] == [{'name': 'Фильм', 'slug': 'films'}]
+        data = client.get(self.url, {'prefix': 'ф'}).json()
+        assert len(data['categories']) == 2, (
+            f'Проверьте, что индекс `{self.url}` обновляется при изменении '
+            'категорий.'
+        )
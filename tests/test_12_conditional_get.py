@@ -0,0 +1,132 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.versions import get_versions
+from reviews.models import Genre, Title
+from tests.utils import create_comments, create_reviews, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ConditionalGet:
+
+    def check_not_modified(self, client, url):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        etag = response.get('ETag')
+        assert etag, (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовок `ETag`.'
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+        assert len(context.captured_queries) == 0, (
+            f'Проверьте, что ответ 304 на GET-запрос к `{url}` отдаётся '
+            'без запросов к базе данных.'
+        )
+        return etag
+
+    def test_01_catalog(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        for url in ('/api/v1/titles/', '/api/v1/genres/',
+                    '/api/v1/categories/',
+                    f'/api/v1/titles/{titles[0]["id"]}/'):
+            self.check_not_modified(client, url)
+
+        etag = self.check_not_modified(client, '/api/v1/genres/')
+        admin_client.post(
+            '/api/v1/genres/', data={'name': 'Вестерн', 'slug': 'western'}
+        )
+        response = client.get('/api/v1/genres/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после изменения жанров ETag списка жанров '
+            'меняется.'
+        )
+
+        response = client.get('/api/v1/titles/')
+        last_modified = response.get('Last-Modified')
+        assert last_modified, (
+            'Проверьте, что ответ на GET-запрос к `/api/v1/titles/` содержит '
+            'заголовок `Last-Modified`.'
+        )
+        response = client.get(
+            '/api/v1/titles/', HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    def test_02_reviews(self, client, admin_client, admin, user, user_client):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = self.check_not_modified(client, url)
+        title_etag = self.check_not_modified(
+            client, f'/api/v1/titles/{titles[0]["id"]}/'
+        )
+
+        user_client.patch(f'{url}{reviews[1]["id"]}/', data={'score': 1})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после изменения отзыва ETag списка отзывов '
+            'меняется.'
+        )
+        response = client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            HTTP_IF_NONE_MATCH=title_etag
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после изменения отзыва ETag произведения '
+            'меняется вместе с рейтингом.'
+        )
+
+    def test_03_after_commit(self, client, admin_client, admin, user,
+                             user_client):
+        versions, _ = get_versions(('genres',))
+        with transaction.atomic():
+            Genre.objects.create(name='Вестерн', slug='western')
+            assert get_versions(('genres',))[0] == versions, (
+                'Проверьте, что версия коллекции меняется только после '
+                'фиксации транзакции.'
+            )
+        assert get_versions(('genres',))[0] != versions
+
+        _, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        etag = self.check_not_modified(client, url)
+        Title.objects.filter(pk=titles[0]['id']).update(rating=None)
+        call_command('rebuild_ratings', stdout=StringIO())
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после `rebuild_ratings` ETag произведения '
+            'меняется.'
+        )
+
+    def test_04_author_renamed(self, client, admin_client, admin, user,
+                               user_client):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        urls = (
+            reviews_url,
+            f'{reviews_url}{reviews[0]["id"]}/comments/',
+        )
+        etags = [self.check_not_modified(client, url) for url in urls]
+        user_client.patch('/api/v1/users/me/', data={'username': 'renamed'})
+        for url, etag in zip(urls, etags):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что после смены имени автора ETag `{url}` '
+                'меняется.'
+            )
+            assert 'renamed' in response.content.decode()
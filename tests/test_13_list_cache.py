@@ -0,0 +1,91 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Genre
+from tests.utils import create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13ListCache:
+
+    def test_01_genres_cache(self, client, admin_client):
+        genres = create_genre(admin_client)
+        url = '/api/v1/genres/'
+        response = client.get(url, {'search': 'а'})
+        assert response.status_code == HTTPStatus.OK
+        with CaptureQueriesContext(connection) as context:
+            cached = client.get(url, {'search': 'а'})
+        assert len(context.captured_queries) == 0, (
+            f'Проверьте, что повторный GET-запрос к `{url}` отдаётся из кэша '
+            'без запросов к базе данных.'
+        )
+        assert cached.json() == response.json()
+
+        admin_client.post(url, data={'name': 'Фантастика', 'slug': 'sci-fi'})
+        data = client.get(url, {'search': 'а'}).json()
+        assert data['count'] == response.json()['count'] + 1, (
+            f'Проверьте, что кэш `{url}` сбрасывается при создании жанра.'
+        )
+
+        admin_client.delete(f'{url}{genres[0]["slug"]}/')
+        data = client.get(url).json()
+        assert genres[0] not in data['results'], (
+            f'Проверьте, что кэш `{url}` сбрасывается при удалении жанра.'
+        )
+
+    def test_02_categories_cache_by_params(self, client, admin_client):
+        admin_client.post(
+            '/api/v1/categories/', data={'name': 'Фильм', 'slug': 'films'}
+        )
+        admin_client.post(
+            '/api/v1/categories/', data={'name': 'Книги', 'slug': 'books'}
+        )
+        url = '/api/v1/categories/'
+        first = client.get(url, {'limit': 1}).json()
+        second = client.get(url, {'limit': 1, 'offset': 1}).json()
+        assert first['results'] != second['results'], (
+            f'Проверьте, что кэш `{url}` учитывает параметры запроса.'
+        )
+
+    def test_03_single_cache_read(self, client, admin_client, monkeypatch):
+        create_genre(admin_client)
+        url = '/api/v1/genres/'
+        response = client.get(url)
+        reads = []
+        backend = type(caches['default'])
+        get, get_many = backend.get, backend.get_many
+
+        def count_get(self, *args, **kwargs):
+            if not getattr(self, 'in_get_many', False):
+                reads.append(args)
+            return get(self, *args, **kwargs)
+
+        def count_get_many(self, *args, **kwargs):
+            reads.append(args)
+            self.in_get_many = True
+            try:
+                return get_many(self, *args, **kwargs)
+            finally:
+                self.in_get_many = False
+
+        monkeypatch.setattr(backend, 'get', count_get)
+        monkeypatch.setattr(backend, 'get_many', count_get_many)
+        assert client.get(url).json() == response.json()
+        assert len(reads) == 1, (
+            f'Проверьте, что ответ `{url}` из кэша читается одним '
+            'обращением к кэшу вместе с версиями коллекций.'
+        )
+        monkeypatch.undo()
+
+        with transaction.atomic():
+            Genre.objects.create(name='Вестерн', slug='western')
+            assert client.get(url).json() == response.json()
+        data = client.get(url).json()
+        assert data['count'] == response.json()['count'] + 1, (
+            f'Проверьте, что кэш `{url}` сбрасывается после фиксации '
+            'транзакции.'
+        )
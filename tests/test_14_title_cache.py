@@ -0,0 +1,116 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api import fragments
+from api.versions import get_versions
+from reviews.models import Genre, Review
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14TitleFragmentCache:
+
+    url = '/api/v1/titles/'
+
+    def get_title(self, client, title_id):
+        return client.get(f'{self.url}{title_id}/').json()
+
+    def test_01_fragments_reused(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        with CaptureQueriesContext(connection) as first:
+            expected = self.get_title(client, title_id)
+        with CaptureQueriesContext(connection) as second:
+            data = self.get_title(client, title_id)
+        assert data == expected
+        assert len(second.captured_queries) < len(first.captured_queries), (
+            f'Проверьте, что повторный GET-запрос к `{self.url}<id>/` '
+            'собирает ответ из кэша сериализованных произведений.'
+        )
+        assert expected in client.get(self.url).json()['results']
+
+    def test_02_fragments_invalidated(self, client, admin_client,
+                                      user_client):
+        titles, _, genres = create_titles(admin_client)
+        title_id = titles[0]['id']
+        self.get_title(client, title_id)
+
+        create_single_review(user_client, title_id, 'text', 6)
+        assert self.get_title(client, title_id)['rating'] == 6, (
+            'Проверьте, что кэш произведения сбрасывается при изменении '
+            'рейтинга.'
+        )
+
+        admin_client.patch(
+            f'{self.url}{title_id}/', data={'genre': [genres[2]['slug']]}
+        )
+        assert self.get_title(client, title_id)['genre'] == [genres[2]], (
+            'Проверьте, что кэш произведения сбрасывается при изменении '
+            'жанров.'
+        )
+
+        genre = Genre.objects.get(slug=genres[2]['slug'])
+        genre.name = 'Детектив'
+        genre.save()
+        data = self.get_title(client, title_id)
+        assert data['genre'][0]['name'] == 'Детектив', (
+            'Проверьте, что кэш произведений сбрасывается при изменении '
+            'жанра.'
+        )
+
+    def test_03_commands(self, client, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'text', 6)
+        assert self.get_title(client, title_id)['rating'] == 6
+
+        Review.objects.filter(title_id=title_id).update(score=2)
+        call_command('rebuild_ratings', stdout=StringIO())
+        assert self.get_title(client, title_id)['rating'] == 2, (
+            'Проверьте, что `rebuild_ratings` сбрасывает кэш произведений.'
+        )
+
+    def test_04_list_fragments(self, client, admin_client):
+        create_titles(admin_client)
+        with CaptureQueriesContext(connection) as first:
+            expected = client.get(self.url).json()
+        with CaptureQueriesContext(connection) as second:
+            data = client.get(self.url).json()
+        assert data == expected
+        assert len(second.captured_queries) < len(first.captured_queries), (
+            f'Проверьте, что список `{self.url}` собирается из кэша '
+            'сериализованных произведений.'
+        )
+        title = expected['results'][0]
+        with CaptureQueriesContext(connection) as detail:
+            assert self.get_title(client, title['id']) == title
+        assert len(detail.captured_queries) == 1, (
+            'Проверьте, что список и произведение используют общий кэш '
+            'фрагментов.'
+        )
+
+    def test_05_late_write(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title = titles[0]
+        stale = self.get_title(client, title['id'])
+        versions, _ = get_versions(fragments.STAMP_COLLECTIONS)
+        stamp = fragments.get_stamp(
+            dict(zip(fragments.STAMP_COLLECTIONS, versions))
+        )
+        admin_client.patch(f'{self.url}{title["id"]}/', data={'name': 'New'})
+        # Читатель, загрузивший произведение до записи, сохраняет фрагмент
+        # после неё.
+        fragments.set_fragments({title['id']: stale}, stamp)
+        assert self.get_title(client, title['id'])['name'] == 'New', (
+            'Проверьте, что фрагмент, сохранённый по данным до записи, не '
+            'отдаётся после неё.'
+        )
+        names = {
+            item['id']: item['name']
+            for item in client.get(self.url).json()['results']
+        }
+        assert names[title['id']] == 'New'
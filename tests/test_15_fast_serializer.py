@@ -0,0 +1,40 @@
+import pytest
+
+from api.views import TitleViewSet
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15FastTitleSerializer:
+
+    urls = (
+        '/api/v1/titles/',
+        '/api/v1/titles/?limit=1&offset=1',
+        '/api/v1/titles/?ordering=-name',
+        '/api/v1/titles/?genre=comedy',
+        '/api/v1/titles/?category=books',
+        '/api/v1/titles/?q=back',
+        '/api/v1/titles/?pagination=cursor&limit=1',
+    )
+
+    def test_01_parity(self, client, admin_client, user_client,
+                       moderator_client, monkeypatch):
+        titles, categories, genres = create_titles(admin_client)
+        admin_client.post('/api/v1/titles/', data={
+            'name': 'Back to the Future',
+            'year': 1985,
+            'genre': [genres[2]['slug'], genres[0]['slug'], genres[1]['slug']],
+            'category': categories[0]['slug'],
+        })
+        create_single_review(user_client, titles[0]['id'], 'text', 4)
+        create_single_review(moderator_client, titles[0]['id'], 'text', 9)
+        admin_client.delete(f'/api/v1/categories/{categories[1]["slug"]}/')
+
+        fast = [client.get(url).content for url in self.urls]
+        monkeypatch.setattr(TitleViewSet, 'fast_list_serializer_class', None)
+        regular = [client.get(url).content for url in self.urls]
+        for url, fast_content, content in zip(self.urls, fast, regular):
+            assert fast_content == content, (
+                f'Проверьте, что быстрый сериализатор для `{url}` выдаёт '
+                'тот же ответ, что и TitleSerializer.'
+            )
@@ -0,0 +1,104 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.views import TitleViewSet
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16SparseFields:
+
+    def get(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        return response.json(), sql
+
+    @pytest.mark.parametrize('fast', (True, False))
+    def test_01_titles(self, client, admin_client, admin, monkeypatch,
+                       fast):
+        create_comments(admin_client, {admin: admin_client})
+        if not fast:
+            monkeypatch.setattr(
+                TitleViewSet, 'fast_list_serializer_class', None
+            )
+        data, sql = self.get(client, '/api/v1/titles/?fields=id,name,rating')
+        assert all(
+            set(title) == {'id', 'name', 'rating'}
+            for title in data['results']
+        ), (
+            'Проверьте, что `?fields=` у `/api/v1/titles/` оставляет в '
+            'ответе только перечисленные поля.'
+        )
+        assert 'description' not in sql and 'reviews_genre' not in sql, (
+            'Проверьте, что `?fields=` у `/api/v1/titles/` не загружает '
+            'из БД столбцы и связи неперечисленных полей.'
+        )
+
+        data, _ = self.get(client, '/api/v1/titles/?omit=genre,description')
+        assert set(data['results'][0]) == {
+            'id', 'name', 'year', 'rating', 'review_count', 'category'
+        }, (
+            'Проверьте, что `?omit=` у `/api/v1/titles/` убирает из ответа '
+            'перечисленные поля.'
+        )
+
+    def test_02_reviews_and_comments(self, client, admin_client, admin):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data, sql = self.get(client, f'{url}?fields=id,score')
+        assert data['results'] == [{'id': reviews[0]['id'], 'score': 5}], (
+            f'Проверьте, что `?fields=` у `{url}` оставляет в ответе только '
+            'перечисленные поля.'
+        )
+        assert '"text"' not in sql
+
+        url = f'{url}{reviews[0]["id"]}/comments/'
+        data, _ = self.get(client, f'{url}?omit=text,pub_date')
+        assert data['results'] == [
+            {'id': comments[0]['id'], 'author': admin.username}
+        ], (
+            f'Проверьте, что `?omit=` у `{url}` убирает из ответа '
+            'перечисленные поля.'
+        )
+
+    def test_03_ordering_and_cursor(self, client, admin_client, admin,
+                                    user_client, user):
+        _, _, titles = create_comments(admin_client, {
+            admin: admin_client,
+            user: user_client,
+        })
+        url = ('/api/v1/titles/?fields=name&ordering=year'
+               '&pagination=cursor&limit=1')
+        response = client.get(url)
+        assert response.status_code == 200, (
+            'Проверьте, что `?fields=` вместе с `?ordering=` и курсорной '
+            'пагинацией у `/api/v1/titles/` не приводит к ошибке.'
+        )
+        assert all(
+            set(title) == {'name'} for title in response.json()['results']
+        )
+
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/?ordering=score'
+        expected = [
+            {'id': review['id']} for review in client.get(url).json()['results']
+        ]
+        url = f'{url}&fields=id&pagination=cursor&limit=1'
+        results = []
+        while url:
+            with CaptureQueriesContext(connection) as context:
+                data = client.get(url).json()
+            assert len(context.captured_queries) == 2, (
+                'Проверьте, что поля сортировки загружаются вместе с '
+                'запрошенными полями, а не отдельным запросом на каждый '
+                'объект.'
+            )
+            results.extend(data['results'])
+            url = data['next']
+        assert results == expected, (
+            'Проверьте, что курсорная пагинация с `?fields=` и '
+            '`?ordering=` проходит все отзывы по порядку.'
+        )
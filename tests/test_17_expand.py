@@ -0,0 +1,123 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments, create_single_comment
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17Expand:
+
+    def get(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        return response, len(context.captured_queries)
+
+    def create(self, admin_client, admin, user_client, user,
+               moderator_client, moderator):
+        return create_comments(admin_client, {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client,
+        })
+
+    def test_01_title_reviews_and_comments(self, client, admin_client, admin,
+                                           user_client, user,
+                                           moderator_client, moderator):
+        comments, reviews, titles = self.create(
+            admin_client, admin, user_client, user, moderator_client,
+            moderator
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        response, queries = self.get(
+            client, f'{url}?expand=reviews.comments'
+        )
+        data = response.json()
+        assert data['name'] == titles[0]['name']
+        assert [review['id'] for review in data['reviews']] == [
+            review['id'] for review in reversed(reviews)
+        ], (
+            f'Проверьте, что `?expand=reviews` у `{url}` встраивает отзывы '
+            'произведения, начиная с новых.'
+        )
+        embedded = {review['id']: review for review in data['reviews']}
+        assert [
+            comment['text'] for comment in embedded[reviews[0]['id']]['comments']
+        ] == [comment['text'] for comment in reversed(comments)], (
+            f'Проверьте, что `?expand=reviews.comments` у `{url}` встраивает '
+            'комментарии в каждый отзыв.'
+        )
+        assert embedded[reviews[1]['id']]['comments'] == []
+
+        create_single_comment(
+            user_client, titles[0]['id'], reviews[1]['id'], 'new comment'
+        )
+        create_single_comment(
+            user_client, titles[0]['id'], reviews[2]['id'], 'new comment'
+        )
+        _, more_queries = self.get(client, f'{url}?expand=reviews.comments')
+        assert more_queries == queries, (
+            f'Проверьте, что число запросов к БД у `{url}?expand=` не '
+            'зависит от числа встроенных объектов.'
+        )
+
+        data = client.get(f'{url}?expand=reviews').json()
+        assert 'comments' not in data['reviews'][0]
+        assert 'reviews' not in client.get(url).json()
+
+    def test_02_limits(self, client, admin_client, admin, user_client, user,
+                       moderator_client, moderator):
+        comments, reviews, titles = self.create(
+            admin_client, admin, user_client, user, moderator_client,
+            moderator
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        data = client.get(
+            f'{url}?expand=reviews.comments&reviews_limit=3&comments_limit=2'
+        ).json()
+        commented = data['reviews'][-1]
+        assert commented['id'] == reviews[0]['id']
+        assert [comment['text'] for comment in commented['comments']] == [
+            comments[2]['text'], comments[1]['text']
+        ], (
+            'Проверьте, что `?comments_limit=` ограничивает число '
+            'встроенных комментариев каждого отзыва.'
+        )
+        data = client.get(f'{url}?expand=reviews&reviews_limit=1').json()
+        assert [review['id'] for review in data['reviews']] == [
+            reviews[2]['id']
+        ], (
+            'Проверьте, что `?reviews_limit=` ограничивает число '
+            'встроенных отзывов.'
+        )
+        response = client.get(f'{url}?expand=reviews&reviews_limit=x')
+        assert response.status_code == 400
+
+    def test_03_review_list(self, client, admin_client, admin):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data = client.get(f'{url}?expand=comments').json()
+        assert data['results'][0]['comments'][0]['text'] == (
+            comments[0]['text']
+        ), (
+            f'Проверьте, что `?expand=comments` у `{url}` встраивает '
+            'комментарии в каждый отзыв.'
+        )
+
+    def test_04_etag(self, client, admin_client, admin):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/?expand=reviews.comments'
+        etag = client.get(url)['ETag']
+        create_single_comment(
+            admin_client, titles[0]['id'], reviews[0]['id'], 'new comment'
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что новый комментарий меняет ETag произведения со '
+            'встроенными комментариями.'
+        )
+        assert len(response.json()['reviews'][0]['comments']) == 2
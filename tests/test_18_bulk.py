@@ -0,0 +1,142 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import GenreTitle, ScoreDistribution, Title
+from tests.utils import create_categories, create_genre, create_titles
+
+URL = '/api/v1/titles/bulk/'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18BulkTitles:
+
+    def items(self, count):
+        return [
+            {
+                'name': f'Произведение {idx}',
+                'year': 2000 + idx % 20,
+                'genre': ['horror', 'drama'],
+                'category': 'films',
+            }
+            for idx in range(count)
+        ]
+
+    def test_01_create(self, client, admin_client):
+        create_genre(admin_client)
+        create_categories(admin_client)
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(URL, self.items(3), format='json')
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Проверьте, что POST-запрос администратора к `{URL}` со списком '
+            'корректных произведений возвращает ответ со статусом 201.'
+        )
+        queries = len(context.captured_queries)
+        data = response.json()
+        assert [title['name'] for title in data] == [
+            f'Произведение {idx}' for idx in range(3)
+        ]
+        assert data[0]['genre'] == [
+            {'name': 'Ужасы', 'slug': 'horror'},
+            {'name': 'Драма', 'slug': 'drama'},
+        ]
+        assert data[0]['category'] == {'name': 'Фильм', 'slug': 'films'}
+        assert data[0]['rating'] is None
+        assert client.get(f'/api/v1/titles/{data[0]["id"]}/').json() == (
+            data[0]
+        )
+        assert ScoreDistribution.objects.count() == 3
+        assert client.get('/api/v1/titles/?q=Произведение').json()[
+            'count'
+        ] == 3, 'Проверьте, что созданные произведения попадают в поиск.'
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(URL, self.items(30), format='json')
+        assert response.status_code == HTTPStatus.CREATED
+        assert len(context.captured_queries) == queries, (
+            f'Проверьте, что число запросов к БД у `{URL}` не зависит от '
+            'числа произведений.'
+        )
+        assert Title.objects.count() == 33
+        assert GenreTitle.objects.count() == 66
+
+    def test_02_update(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        client.get(url)
+        item = {
+            'id': titles[0]['id'],
+            'name': 'Терминатор 2',
+            'year': 1991,
+            'genre': ['drama'],
+            'category': 'books',
+        }
+        response = admin_client.post(URL, [item], format='json')
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что POST-запрос к `{URL}`, который только обновляет '
+            'произведения, возвращает ответ со статусом 200.'
+        )
+        data = client.get(url).json()
+        assert data['name'] == 'Терминатор 2'
+        assert data['genre'] == [{'name': 'Драма', 'slug': 'drama'}], (
+            f'Проверьте, что элемент с `id` в `{URL}` заменяет жанры '
+            'произведения.'
+        )
+        assert data['category'] == {'name': 'Книги', 'slug': 'books'}
+        assert Title.objects.count() == len(titles)
+
+    def test_03_errors(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        items = self.items(3)
+        items[1]['genre'] = ['horror', 'unknown']
+        items[2]['id'] = 100500
+        response = admin_client.post(
+            URL, items + [{'name': 'Без года'}], format='json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        errors = response.json()
+        assert len(errors) == 4 and errors[0] == {}, (
+            f'Проверьте, что `{URL}` возвращает ошибки списком по элементам '
+            'запроса.'
+        )
+        assert set(errors[3]) == {'year', 'genre', 'category'}
+
+        response = admin_client.post(URL, items, format='json')
+        errors = response.json()
+        assert errors[0] == {} and 'genre' in errors[1] and 'id' in errors[2]
+        assert Title.objects.count() == len(titles), (
+            f'Проверьте, что при ошибках в `{URL}` ничего не записывается.'
+        )
+
+    def test_04_permissions(self, client, user_client):
+        assert client.post(
+            URL, '[]', content_type='application/json'
+        ).status_code == HTTPStatus.UNAUTHORIZED
+        assert user_client.post(URL, [], format='json').status_code == (
+            HTTPStatus.FORBIDDEN
+        )
+
+    def test_05_batches(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        items = self.items(2000)
+        for item, title in zip(items, titles):
+            item['id'] = title['id']
+        response = admin_client.post(URL, items, format='json')
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Проверьте, что `{URL}` укладывается в бюджет запросов при '
+            'записи несколькими пачками.'
+        )
+        data = response.json()
+        assert [title['name'] for title in data] == [
+            item['name'] for item in items
+        ]
+        assert Title.objects.count() == 2000
+        assert GenreTitle.objects.count() == 4000
+        assert ScoreDistribution.objects.count() == 2000
+        assert len({title['id'] for title in data}) == 2000
+        assert all(
+            Title.objects.get(pk=title['id']).name == title['name']
+            for title in data[::250]
+        ), 'Проверьте, что ответ содержит id записанных произведений.'
@@ -0,0 +1,157 @@
+import csv
+import shutil
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+
+from reviews.management.commands.import_data import DICT, csv_import
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+DATA_PATH = settings.BASE_DIR / 'static' / 'data'
+
+
+def count_rows(file_name):
+    with open(DATA_PATH / file_name, newline='', encoding='utf8') as file:
+        return sum(1 for _ in csv.DictReader(file))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19ImportData:
+
+    @pytest.mark.parametrize('workers', (1, 2))
+    def test_01_import(self, client, workers):
+        out = StringIO()
+        call_command(
+            'import_data', path=DATA_PATH, chunk_size=7, workers=workers,
+            stdout=out
+        )
+        for model, file_name in DICT.items():
+            assert model.objects.count() == count_rows(file_name), (
+                f'Проверьте, что `import_data` загружает все строки '
+                f'{file_name} при загрузке пачками и с `--workers`.'
+            )
+        assert 'Загрузка завершена' in out.getvalue()
+        assert 'строк/с' in out.getvalue(), (
+            'Проверьте, что `import_data` сообщает скорость загрузки.'
+        )
+        review = Review.objects.order_by('pk').first()
+        assert review.pub_date.year == 2019, (
+            'Проверьте, что `import_data` сохраняет даты из файлов.'
+        )
+        title = Title.objects.filter(reviews__isnull=False).first()
+        response = client.get(f'/api/v1/titles/{title.pk}/')
+        assert response.json()['rating'] is not None
+
+    def test_02_chunks(self):
+        calls = []
+        with open(DATA_PATH / 'genre.csv', newline='',
+                  encoding='utf8') as file:
+            result = csv_import(
+                csv.DictReader(file), Genre, chunk_size=5,
+                progress=calls.append
+            )
+        count = result.rows
+        assert count == Genre.objects.count() == count_rows('genre.csv')
+        assert calls == [
+            min(size, count) for size in range(5, count + 5, 5)
+        ], 'Проверьте, что `csv_import` записывает строки пачками.'
+
+    def test_02_01_ids_only_with_upsert(self):
+        for model in (Category, Title):
+            with open(DATA_PATH / DICT[model], newline='',
+                      encoding='utf8') as file:
+                result = csv_import(csv.DictReader(file), model)
+        assert result.written == Title.objects.count()
+        assert not result.title_ids, (
+            'Проверьте, что без `--upsert` `csv_import` не собирает id '
+            'произведений: счётчики пересчитываются целиком.'
+        )
+
+    @pytest.mark.parametrize('workers', (1, 2))
+    @pytest.mark.parametrize('single_transaction', (False, True))
+    def test_03_atomic(self, tmp_path, single_transaction, workers):
+        for file_name in DICT.values():
+            shutil.copy(DATA_PATH / file_name, tmp_path / file_name)
+        with open(tmp_path / 'comments.csv', 'a', encoding='utf8') as file:
+            file.write('\n999,1,text,100,2020-01-13T23:20:02.422Z,extra\n')
+        with pytest.raises(CommandError):
+            call_command(
+                'import_data', path=tmp_path, chunk_size=1, workers=workers,
+                single_transaction=single_transaction, stdout=StringIO()
+            )
+        assert Comment.objects.count() == 0, (
+            'Проверьте, что ошибка в файле откатывает загрузку всего файла.'
+        )
+        if single_transaction:
+            assert User.objects.count() == 0, (
+                'Проверьте, что с `--single-transaction` ошибка откатывает '
+                'всю загрузку.'
+            )
+        else:
+            assert Review.objects.count() == count_rows('review.csv')
+
+    def test_04_validation(self, tmp_path):
+        for file_name in DICT.values():
+            shutil.copy(DATA_PATH / file_name, tmp_path / file_name)
+        with open(tmp_path / 'titles.csv', 'a', encoding='utf8') as file:
+            file.write('\n999,Новое,год,1\n')
+        with pytest.raises(CommandError, match='year'):
+            call_command(
+                'import_data', path=tmp_path, workers=2, stdout=StringIO()
+            )
+
+    @pytest.mark.parametrize('workers', (1, 2))
+    def test_05_upsert(self, client, tmp_path, workers):
+        call_command('import_data', path=DATA_PATH, stdout=StringIO())
+        for file_name in DICT.values():
+            shutil.copy(DATA_PATH / file_name, tmp_path / file_name)
+        out = StringIO()
+        call_command(
+            'import_data', path=tmp_path, upsert=True, workers=workers,
+            stdout=out
+        )
+        total = sum(count_rows(file_name) for file_name in DICT.values())
+        assert f'{total} строк, записано 0,' in out.getvalue(), (
+            'Проверьте, что `import_data --upsert` не записывает '
+            'неизменившиеся строки.'
+        )
+
+        review = Review.objects.order_by('pk').first()
+        title = review.title
+        with open(tmp_path / 'review.csv', newline='', encoding='utf8') as file:
+            rows = list(csv.reader(file))
+        header = rows[0]
+        rows[1][header.index('score')] = str(review.score % 10 + 1)
+        rows.append([
+            '999', '999', 'Новый отзыв', '100', '1',
+            '2020-01-13T23:20:02.422Z'
+        ])
+        with open(tmp_path / 'review.csv', 'w', newline='',
+                  encoding='utf8') as file:
+            csv.writer(file).writerows(rows)
+        with open(tmp_path / 'titles.csv', 'a', encoding='utf8') as file:
+            file.write('\n999,Новое произведение,2000,1\n')
+        out = StringIO()
+        call_command(
+            'import_data', path=tmp_path, upsert=True, workers=workers,
+            stdout=out
+        )
+        assert f'{total + 2} строк, записано 3,' in out.getvalue(), (
+            'Проверьте, что `import_data --upsert` записывает только новые '
+            'и изменившиеся строки.'
+        )
+        review.refresh_from_db()
+        assert review.score == int(rows[1][header.index('score')])
+        scores = Review.objects.filter(title=title).values_list(
+            'score', flat=True
+        )
+        response = client.get(f'/api/v1/titles/{title.pk}/').json()
+        assert response['rating'] == int(sum(scores) / len(scores)), (
+            'Проверьте, что `import_data --upsert` пересчитывает рейтинг '
+            'затронутых произведений.'
+        )
+        search = client.get('/api/v1/titles/?q=Новое произведение').json()
+        assert [item['id'] for item in search['results']] == [999]
+        assert search['results'][0]['rating'] == 1
@@ -0,0 +1,70 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count
+
+from reviews.management.commands.import_data import DICT
+from reviews.models import Comment, Review, Title, User
+
+COUNTS = {
+    'users': 20,
+    'categories': 3,
+    'genres': 5,
+    'titles': 30,
+    'reviews': 200,
+    'comments': 50,
+}
+
+
+def generate(**options):
+    call_command('generate_data', stdout=StringIO(), **COUNTS, **options)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20GenerateData:
+
+    def test_01_database(self, client):
+        generate()
+        assert User.objects.count() == COUNTS['users']
+        assert Title.objects.count() == COUNTS['titles']
+        assert Review.objects.count() == COUNTS['reviews'], (
+            'Проверьте, что `generate_data` создаёт заданное число отзывов.'
+        )
+        assert Comment.objects.count() == COUNTS['comments']
+        counts = sorted(
+            Title.objects.annotate(reviews_count=Count('reviews'))
+            .values_list('reviews_count', flat=True),
+            reverse=True
+        )
+        assert counts[0] > 3 * counts[len(counts) // 2], (
+            'Проверьте, что популярность произведений в `generate_data` '
+            'распределена неравномерно.'
+        )
+        title = Title.objects.filter(reviews__isnull=False).first()
+        assert client.get(f'/api/v1/titles/{title.pk}/').json()['rating']
+
+        generate()
+        assert Title.objects.count() == 2 * COUNTS['titles'], (
+            'Проверьте, что повторный запуск `generate_data` добавляет '
+            'данные к уже существующим.'
+        )
+
+    def test_02_csv(self, tmp_path):
+        generate(output=tmp_path / 'first', seed=1)
+        generate(output=tmp_path / 'second', seed=1)
+        for file_name in DICT.values():
+            assert (tmp_path / 'first' / file_name).read_bytes() == (
+                tmp_path / 'second' / file_name
+            ).read_bytes(), (
+                'Проверьте, что `generate_data` с одинаковым `--seed` '
+                'генерирует одинаковые данные.'
+            )
+        assert User.objects.count() == 0
+        call_command(
+            'import_data', path=tmp_path / 'first', stdout=StringIO()
+        )
+        assert Review.objects.count() == COUNTS['reviews'], (
+            'Проверьте, что `import_data` загружает файлы `generate_data`.'
+        )
+        assert Comment.objects.count() == COUNTS['comments']
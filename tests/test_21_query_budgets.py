@@ -0,0 +1,74 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.budgets import QUERY_BUDGETS, QueryBudgetExceeded
+from api.urls import router
+from tests.utils import create_comments, create_single_comment
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21QueryBudgets:
+
+    def count_queries(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200
+        return len(context.captured_queries)
+
+    def test_01_every_action_has_budget(self):
+        missing = []
+        for url in router.urls:
+            basename = url.callback.initkwargs['basename']
+            # Маршрут `comment` с переносом строки в шаблоне недостижим.
+            if basename == 'comment':
+                continue
+            for action in url.callback.actions.values():
+                if f'{basename}.{action}' not in QUERY_BUDGETS:
+                    missing.append(f'{basename}.{action}')
+        for name in ('user_signup', 'get_token', 'suggest'):
+            if name not in QUERY_BUDGETS:
+                missing.append(name)
+        assert not missing, (
+            'Проверьте, что в `api.budgets.QUERY_BUDGETS` задан бюджет '
+            f'запросов для каждого действия API, нет: {", ".join(missing)}.'
+        )
+
+    def test_02_budget_exceeded(self, client, monkeypatch, settings):
+        monkeypatch.setitem(QUERY_BUDGETS, 'categories.list', 0)
+        with pytest.raises(QueryBudgetExceeded, match='categories.list'):
+            client.get('/api/v1/categories/')
+
+        settings.ENFORCE_QUERY_BUDGETS = False
+        assert client.get('/api/v1/categories/').status_code == 200, (
+            'Проверьте, что без `ENFORCE_QUERY_BUDGETS` бюджеты запросов '
+            'не проверяются.'
+        )
+
+    def test_03_lists_do_not_grow(self, client, admin_client, admin,
+                                  user_client, user, moderator_client,
+                                  moderator):
+        comments, reviews, titles = create_comments(admin_client, {
+            admin: admin_client,
+        })
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        urls = (
+            '/api/v1/titles/',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{title_id}/reviews/?expand=comments',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+        )
+        before = [self.count_queries(admin_client, url) for url in urls]
+        for author_client in (user_client, moderator_client):
+            create_single_comment(
+                author_client, title_id, review_id, 'Ещё комментарий'
+            )
+            author_client.post(
+                f'/api/v1/titles/{title_id}/reviews/',
+                data={'text': 'Ещё отзыв', 'score': 7}
+            )
+        after = [self.count_queries(admin_client, url) for url in urls]
+        assert before == after, (
+            'Проверьте, что число запросов к БД у списков не зависит от '
+            'числа объектов в ответе.'
+        )
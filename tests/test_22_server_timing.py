@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from api.timing import PHASES
+from tests.utils import create_titles
+
+
+def parse_server_timing(header):
+    result = {}
+    for part in header.split(', '):
+        name, *params = part.split(';')
+        result[name] = dict(param.split('=', 1) for param in params)
+    return result
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22ServerTiming:
+
+    def test_01_disabled_by_default(self, client):
+        response = client.get('/api/v1/titles/')
+        assert 'Server-Timing' not in response, (
+            'Проверьте, что без `SERVER_TIMING` заголовок `Server-Timing` '
+            'не добавляется.'
+        )
+
+    def test_02_header(self, admin_client, settings):
+        titles, _, _ = create_titles(admin_client)
+        settings.SERVER_TIMING = True
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        response = admin_client.get(url)
+        assert response.status_code == 200
+        timing = parse_server_timing(response['Server-Timing'])
+        assert list(timing) == list(PHASES), (
+            f'Проверьте, что `Server-Timing` ответа `{url}` содержит части '
+            f'{", ".join(PHASES)}.'
+        )
+        durations = {
+            name: float(params['dur']) for name, params in timing.items()
+        }
+        assert all(duration >= 0 for duration in durations.values())
+        assert durations['db'] > 0 and durations['auth'] > 0
+        assert durations['serialize'] > 0 and durations['render'] > 0
+        assert sum(
+            duration for name, duration in durations.items()
+            if name != 'total'
+        ) <= durations['total'], (
+            'Проверьте, что части `Server-Timing` не пересекаются.'
+        )
+        assert timing['db']['desc'] == '"3 queries"', (
+            'Проверьте, что в описании `db` указано число SQL-запросов.'
+        )
+
+    def test_03_sampled_log(self, client, settings, caplog):
+        settings.SERVER_TIMING = True
+        settings.SERVER_TIMING_LOG_SAMPLE_RATE = 1.0
+        with caplog.at_level('INFO', logger='api.timing'):
+            response = client.get('/api/v1/categories/')
+        records = [
+            json.loads(record.getMessage()) for record in caplog.records
+            if record.name == 'api.timing'
+        ]
+        assert len(records) == 1, (
+            'Проверьте, что при `SERVER_TIMING_LOG_SAMPLE_RATE = 1` каждый '
+            'запрос пишется в лог `api.timing`.'
+        )
+        assert records[0]['action'] == 'categories.list'
+        assert records[0]['status'] == response.status_code
+        assert set(f'{name}_ms' for name in PHASES) <= set(records[0])
+
+        caplog.clear()
+        settings.SERVER_TIMING_LOG_SAMPLE_RATE = 0.0
+        with caplog.at_level('INFO', logger='api.timing'):
+            client.get('/api/v1/categories/')
+        assert not caplog.records
@@ -0,0 +1,101 @@
+import pytest
+
+from api.metrics import MmapStore
+
+
+def parse_metrics(text):
+    values = {}
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            key, value = line.rsplit(' ', 1)
+            values[key] = float(value)
+    return values
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23Metrics:
+
+    @pytest.fixture(autouse=True)
+    def metrics_dir(self, settings, tmp_path):
+        settings.METRICS_DIR = str(tmp_path)
+        settings.METRICS_ALLOWED_IPS = ['127.0.0.1']
+        return tmp_path
+
+    def test_01_requests(self, client):
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/titles/999/')
+        client.get('/nowhere/')
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+        text = response.content.decode()
+        assert '# TYPE yamdb_http_request_duration_seconds histogram' in text
+        values = parse_metrics(text)
+        labels = 'route="categories",action="list"'
+        assert values[
+            f'yamdb_http_requests_total{{{labels},method="GET",status="200"}}'
+        ] == 2, (
+            'Проверьте, что `/metrics` считает ответы по маршруту, '
+            'действию и статусу.'
+        )
+        assert values[
+            f'yamdb_http_request_duration_seconds_bucket{{{labels},'
+            f'le="+Inf"}}'
+        ] == 2
+        assert values[
+            f'yamdb_http_request_duration_seconds_count{{{labels}}}'
+        ] == 2
+        assert values[f'yamdb_db_queries_per_request_count{{{labels}}}'] == 2
+        assert values[
+            'yamdb_http_requests_total{route="titles",action="retrieve",'
+            'method="GET",status="404"}'
+        ] == 1
+        assert values[
+            'yamdb_http_requests_total{route="unmatched",action="",'
+            'method="GET",status="404"}'
+        ] == 1
+        assert values[
+            'yamdb_cache_requests_total{cache="lists",result="hit"}'
+        ] == 1, 'Проверьте, что `/metrics` считает попадания в кэш.'
+        assert values[
+            'yamdb_cache_requests_total{cache="lists",result="miss"}'
+        ] == 1
+
+    def test_02_processes(self, client, metrics_dir):
+        key = 'yamdb_cache_requests_total{cache="fragments",result="hit"}'
+        MmapStore(metrics_dir / 'metrics_1.db').inc(key, 3)
+        other = MmapStore(metrics_dir / 'metrics_2.db')
+        for number in range(5000):
+            # Файл растёт сверх начального размера.
+            other.inc(f'yamdb_http_requests_total{{route="r{number}"}}')
+        other.inc(key, 4)
+        values = parse_metrics(client.get('/metrics').content.decode())
+        assert values[key] == 7, (
+            'Проверьте, что `/metrics` суммирует значения всех процессов.'
+        )
+        assert values['yamdb_http_requests_total{route="r4999"}'] == 1
+
+        MmapStore(metrics_dir / 'metrics_2.db').inc(key, 1)
+        values = parse_metrics(client.get('/metrics').content.decode())
+        assert values[key] == 8, (
+            'Проверьте, что значения сохраняются при повторном открытии '
+            'файла метрик.'
+        )
+
+    def test_03_allowed_ips(self, client, admin_client, settings):
+        settings.METRICS_ALLOWED_IPS = []
+        assert client.get('/metrics').status_code == 403, (
+            'Проверьте, что с пустым `METRICS_ALLOWED_IPS` `/metrics` '
+            'недоступен ни с какого адреса, в том числе с 127.0.0.1.'
+        )
+        for http_client in (client, admin_client):
+            response = http_client.get('/metrics', REMOTE_ADDR='10.0.0.5')
+            assert response.status_code == 403, (
+                'Проверьте, что `/metrics` недоступен с адресов не из '
+                '`METRICS_ALLOWED_IPS`.'
+            )
+        settings.METRICS_ALLOWED_IPS = ['10.0.0.0/24']
+        response = client.get('/metrics', REMOTE_ADDR='10.0.0.5')
+        assert response.status_code == 200
+        assert client.get('/metrics').status_code == 403
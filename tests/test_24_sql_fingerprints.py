@@ -0,0 +1,109 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from api.fingerprints import fingerprint
+from api.views import ReviewViewSet
+from reviews.models import Title
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24SqlFingerprints:
+
+    @pytest.fixture(autouse=True)
+    def fingerprints(self, settings, tmp_path):
+        settings.METRICS_DIR = str(tmp_path)
+        settings.SQL_FINGERPRINTS = True
+
+    def create(self, admin_client, admin, user_client, user,
+               moderator_client, moderator):
+        reviews, titles = create_reviews(admin_client, {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client,
+        })
+        return f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+    def warnings(self, caplog, text):
+        return [
+            record.getMessage() for record in caplog.records
+            if record.name == 'api.sql' and text in record.getMessage()
+        ]
+
+    def test_01_fingerprint(self):
+        assert fingerprint(
+            'SELECT "a"  FROM "t" WHERE "id" = 15 AND "name" = \'x\'\'y\''
+        ) == 'SELECT "a" FROM "t" WHERE "id" = ? AND "name" = ?'
+        assert fingerprint(
+            'SELECT * FROM "t" WHERE "id" IN (%s, %s, %s) LIMIT 21'
+        ) == fingerprint('SELECT * FROM "t" WHERE "id" IN (%s) LIMIT 1'), (
+            'Проверьте, что отпечаток не зависит от длины списка `IN`.'
+        )
+        assert fingerprint(
+            'INSERT INTO "t" ("a", "b") VALUES (%s, %s), (%s, %s)'
+        ) == 'INSERT INTO "t" ("a", "b") VALUES (?, ?), ...'
+        assert fingerprint('SAVEPOINT "s1404_x1"') == fingerprint(
+            'SAVEPOINT "s2808_x12"'
+        )
+
+    def test_02_repeated_queries(self, client, admin_client, admin,
+                                 user_client, user, moderator_client,
+                                 moderator, monkeypatch, caplog,
+                                 settings):
+        url = self.create(
+            admin_client, admin, user_client, user, moderator_client,
+            moderator
+        )
+        caplog.clear()
+        client.get(url)
+        assert not self.warnings(caplog, 'reviews.list')
+
+        def get_queryset(view):
+            title = Title.objects.get(pk=view.kwargs['title_id'])
+            return title.reviews.all()
+
+        # Авторы отзывов без select_related - N+1, бюджет запросов здесь
+        # не нужен.
+        settings.ENFORCE_QUERY_BUDGETS = False
+        monkeypatch.setattr(ReviewViewSet, 'get_queryset', get_queryset)
+        client.get(url)
+        warnings = self.warnings(caplog, 'reviews.list')
+        assert len(warnings) == 1 and 'reviews_user' in warnings[0], (
+            'Проверьте, что повторяющийся в ответе запрос пишется в лог '
+            '`api.sql` с именем представления.'
+        )
+
+        out = StringIO()
+        call_command('sqlreport', order='repeated', stdout=out)
+        lines = out.getvalue().splitlines()
+        assert 'reviews.list' in lines[1] and '"reviews_user"' in lines[2], (
+            'Проверьте, что `sqlreport --order repeated` выводит первым '
+            'запрос с N+1.'
+        )
+        assert lines[1].split()[0] == '3'
+
+        call_command('sqlreport', reset=True, stdout=StringIO())
+        out = StringIO()
+        call_command('sqlreport', stdout=out)
+        assert out.getvalue().startswith('Нет данных')
+
+    def test_03_slow_queries(self, client, admin_client, admin, user_client,
+                             user, moderator_client, moderator, settings,
+                             caplog):
+        url = self.create(
+            admin_client, admin, user_client, user, moderator_client,
+            moderator
+        )
+        settings.SQL_SLOW_MS = 0
+        caplog.clear()
+        client.get(url)
+        warnings = self.warnings(caplog, 'Медленный запрос в reviews.list')
+        assert warnings, (
+            'Проверьте, что запросы дольше `SQL_SLOW_MS` пишутся в лог.'
+        )
+        assert any('get_queryset' in warning for warning in warnings), (
+            'Проверьте, что для медленного запроса в лог пишется стек '
+            'вызова из кода проекта.'
+        )
@@ -0,0 +1,72 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25NestedParent:
+
+    def create(self, admin_client, admin, user_client, user):
+        comments, reviews, titles = create_comments(admin_client, {
+            admin: admin_client,
+            user: user_client,
+        })
+        return comments[0]['id'], reviews[0]['id'], titles
+
+    def get(self, client, url):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        return response, len(context.captured_queries)
+
+    def test_01_detail_single_query(self, client, admin_client, admin,
+                                    user_client, user):
+        comment_id, review_id, titles = self.create(
+            admin_client, admin, user_client, user
+        )
+        reviews = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response, queries = self.get(
+            client, f'{reviews}{review_id}/comments/{comment_id}/'
+        )
+        assert response.status_code == 200
+        assert queries == 1, (
+            'Проверьте, что комментарий и цепочка произведение - отзыв '
+            'проверяются одним запросом к БД.'
+        )
+        response, queries = self.get(client, f'{reviews}{review_id}/')
+        assert response.status_code == 200
+        assert queries == 1
+
+        response, queries = self.get(client, f'{reviews}{review_id}/comments/')
+        assert response.status_code == 200
+        assert queries == 3, (
+            'Проверьте, что отзыв и произведение для списка комментариев '
+            'загружаются одним запросом.'
+        )
+
+    def test_02_wrong_chain(self, client, admin_client, admin, user_client,
+                            user):
+        comment_id, review_id, titles = self.create(
+            admin_client, admin, user_client, user
+        )
+        other = f'/api/v1/titles/{titles[1]["id"]}/reviews/{review_id}/'
+        for url in (
+            other,
+            f'{other}comments/',
+            f'{other}comments/{comment_id}/',
+            '/api/v1/titles/999/reviews/',
+        ):
+            assert client.get(url).status_code == 404, (
+                f'Проверьте, что GET-запрос к `{url}` с чужим или '
+                'несуществующим родителем возвращает 404.'
+            )
+        response = user_client.post(f'{other}comments/', data={'text': 'x'})
+        assert response.status_code == 404, (
+            'Проверьте, что комментарий нельзя создать к отзыву другого '
+            'произведения.'
+        )
+        response = user_client.patch(
+            f'{other}comments/{comment_id}/', data={'text': 'x'}
+        )
+        assert response.status_code == 404
@@ -0,0 +1,114 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from reviews.models import Review, Title
+from tests.utils import create_comments, create_single_review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26Counters:
+
+    def create(self, admin_client, admin, user_client, user):
+        comments, reviews, titles = create_comments(admin_client, {
+            admin: admin_client,
+            user: user_client,
+        })
+        return comments, reviews, titles
+
+    def test_01_comment_count(self, client, admin_client, admin, user_client,
+                              user):
+        comments, reviews, titles = self.create(
+            admin_client, admin, user_client, user
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        response = client.get(url)
+        assert response.json().get('comment_count') == 2, (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит поле '
+            '`comment_count` с числом комментариев к отзыву.'
+        )
+        user_client.delete(f'{url}comments/{comments[1]["id"]}/')
+        assert client.get(url).json()['comment_count'] == 1, (
+            'Проверьте, что при удалении комментария `comment_count` '
+            'отзыва уменьшается.'
+        )
+        admin_client.patch(url, data={'comment_count': 100})
+        assert Review.objects.get(pk=reviews[0]['id']).comment_count == 1, (
+            'Проверьте, что поле `comment_count` доступно только для чтения.'
+        )
+
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json().get('review_count') == 2, (
+            'Проверьте, что ответ на GET-запрос к произведению содержит '
+            'поле `review_count` с числом отзывов.'
+        )
+
+    def test_02_user_deleted(self, admin_client, admin, user_client, user):
+        _, reviews, titles = self.create(
+            admin_client, admin, user_client, user
+        )
+        user.delete()
+        review = Review.objects.get(pk=reviews[0]['id'])
+        assert review.comment_count == 1, (
+            'Проверьте, что при удалении пользователя счётчик комментариев '
+            'к отзывам уменьшается на число его комментариев.'
+        )
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert title.review_count == 1, (
+            'Проверьте, что при удалении пользователя счётчик отзывов '
+            'к произведениям уменьшается на число его отзывов.'
+        )
+
+    def test_03_ordering(self, client, admin_client, admin, user_client,
+                         user):
+        _, reviews, titles = self.create(
+            admin_client, admin, user_client, user
+        )
+        create_single_review(user_client, titles[1]['id'], 'text', 3)
+        response = client.get('/api/v1/titles/?ordering=-review_count')
+        assert [title['id'] for title in response.json()['results']][:2] == [
+            titles[0]['id'], titles[1]['id']
+        ], (
+            'Проверьте, что произведения можно сортировать по '
+            '`review_count`.'
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        for ordering, expected in (
+            ('comment_count', reviews[1]['id']),
+            ('-comment_count', reviews[0]['id']),
+        ):
+            response = client.get(f'{url}?ordering={ordering}')
+            assert response.json()['results'][0]['id'] == expected, (
+                'Проверьте, что отзывы можно сортировать по '
+                '`comment_count`.'
+            )
+
+    def test_04_stale_save(self, admin_client, admin, user_client, user):
+        _, reviews, titles = self.create(
+            admin_client, admin, user_client, user
+        )
+        title = Title.objects.get(pk=titles[0]['id'])
+        review = Review.objects.get(pk=reviews[0]['id'])
+        review.comment_count = 0
+        review.text = 'changed'
+        review.save()
+        title.review_count = 0
+        title.save()
+        review.refresh_from_db()
+        title.refresh_from_db()
+        assert review.text == 'changed'
+        assert review.comment_count == 2 and title.review_count == 2, (
+            'Проверьте, что `save()` устаревшего объекта не перезаписывает '
+            'счётчики.'
+        )
+
+    def test_05_rebuild(self, admin_client, admin, user_client, user):
+        _, reviews, _ = self.create(admin_client, admin, user_client, user)
+        Review.objects.update(comment_count=0)
+        call_command('rebuild_ratings', stdout=StringIO())
+        assert Review.objects.get(pk=reviews[0]['id']).comment_count == 2, (
+            'Проверьте, что `rebuild_ratings` пересчитывает счётчики '
+            'комментариев.'
+        )
+        assert Review.objects.get(pk=reviews[1]['id']).comment_count == 0
@@ -0,0 +1,136 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.mail.backends.filebased import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+from api import outbox
+from reviews.models import OutboxEmail, User
+
+
+def signup(client, username):
+    response = client.post('/api/v1/auth/signup/', data={
+        'username': username,
+        'email': f'{username}@yamdb.fake',
+    })
+    assert response.status_code == 200
+    return User.objects.get(username=username)
+
+
+def run_outbox(*args):
+    call_command('run_outbox', '--once', *args, stdout=StringIO())
+
+
+@pytest.fixture
+def mail_dir(settings, tmp_path):
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+    settings.EMAIL_FILE_PATH = str(tmp_path)
+    return tmp_path
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28Outbox:
+
+    def test_01_transaction(self, client, monkeypatch, mail_dir):
+        user = signup(client, 'first')
+        email = OutboxEmail.objects.get()
+        assert email.recipient == user.email
+        assert str(user.confirmation_code) in email.body
+        assert email.sent is None and not list(mail_dir.iterdir()), (
+            'Проверьте, что регистрация не отправляет письмо, а ставит его '
+            'в очередь.'
+        )
+
+        def fail(*args, **kwargs):
+            raise RuntimeError('outbox')
+
+        monkeypatch.setattr(outbox, 'enqueue', fail)
+        with pytest.raises(RuntimeError):
+            signup(client, 'second')
+        assert not User.objects.filter(username='second').exists(), (
+            'Проверьте, что пользователь и письмо сохраняются в одной '
+            'транзакции.'
+        )
+
+    def test_02_batches(self, client, mail_dir):
+        users = [signup(client, f'user{number}') for number in range(3)]
+        run_outbox('--batch-size', '2')
+        files = sorted(mail_dir.iterdir())
+        assert len(files) == 2, (
+            'Проверьте, что run_outbox отправляет пачку писем через одно '
+            'соединение.'
+        )
+        text = ''.join(path.read_text() for path in files)
+        for user in users:
+            assert f'Код: {user.confirmation_code}' in text
+            assert user.email in text
+        assert not OutboxEmail.objects.filter(sent__isnull=True).exists()
+
+        run_outbox()
+        assert len(list(mail_dir.iterdir())) == 2, (
+            'Проверьте, что отправленные письма не отправляются повторно.'
+        )
+
+    def test_03_retry(self, client, monkeypatch, settings, mail_dir):
+        settings.OUTBOX_RETRY_DELAY = 10
+        settings.OUTBOX_MAX_RETRY_DELAY = 30
+        assert [
+            outbox.retry_delay(attempts).seconds for attempts in (1, 2, 3)
+        ] == [10, 20, 30]
+
+        signup(client, 'first')
+        signup(client, 'second')
+        write_message = EmailBackend.write_message
+
+        def fail_first(self, message):
+            if 'first' in message.to[0]:
+                raise OSError('disk full')
+            write_message(self, message)
+
+        monkeypatch.setattr(EmailBackend, 'write_message', fail_first)
+        started = timezone.now()
+        run_outbox()
+        failed = OutboxEmail.objects.get(recipient='first@yamdb.fake')
+        assert failed.sent is None and failed.attempts == 1
+        assert 'disk full' in failed.last_error
+        assert failed.send_after >= started + timedelta(seconds=10), (
+            'Проверьте, что письмо с ошибкой отправки повторяется с '
+            'задержкой.'
+        )
+        assert OutboxEmail.objects.get(
+            recipient='second@yamdb.fake'
+        ).sent is not None, (
+            'Проверьте, что ошибка одного письма не мешает отправке '
+            'остальных.'
+        )
+
+        monkeypatch.undo()
+        run_outbox()
+        assert OutboxEmail.objects.get(pk=failed.pk).sent is None
+        OutboxEmail.objects.filter(pk=failed.pk).update(
+            send_after=timezone.now(), attempts=settings.OUTBOX_MAX_ATTEMPTS
+        )
+        run_outbox()
+        assert OutboxEmail.objects.get(pk=failed.pk).sent is None, (
+            'Проверьте, что после OUTBOX_MAX_ATTEMPTS попыток письмо не '
+            'отправляется.'
+        )
+        OutboxEmail.objects.filter(pk=failed.pk).update(attempts=1)
+        run_outbox()
+        assert OutboxEmail.objects.get(pk=failed.pk).sent is not None
+
+    def test_04_claim(self, client, mail_dir):
+        for number in range(3):
+            outbox.enqueue('Код', 'Код: 1', f'user{number}@yamdb.fake')
+        first = outbox.claim(2)
+        second = outbox.claim(2)
+        assert len(first) == 2 and len(second) == 1
+        assert not {email.pk for email in first} & {
+            email.pk for email in second
+        }, (
+            'Проверьте, что письмо, занятое одним обработчиком, не '
+            'достаётся другому.'
+        )
+        assert outbox.claim(2) == []